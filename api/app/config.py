@@ -15,6 +15,17 @@ class Config(object):
     DEBUG = False
     TESTING = False
 
+    SECRET_KEY = os.getenv("SECRET_KEY")
+
+    # Request profiler, see app/utilities/profiler.py
+    PROFILE_ENABLED = os.getenv("PROFILE_ENABLED") == "true"
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", 0))
+    PROFILE_SLOW_SECONDS = float(os.getenv("PROFILE_SLOW_SECONDS", 1))
+    PROFILE_TOKEN_MAX_AGE = int(os.getenv("PROFILE_TOKEN_MAX_AGE", 3600))
+
+    # "sync" or "gevent", see gunicorn_conf.py
+    SERVING_MODE = os.getenv("SERVING_MODE", "sync")
+
     DB_DIALECT = "mysql+pymysql"
     DB_HOST = os.getenv("DB_HOST", "0.0.0.0")
     DB_PORT = os.getenv("DB_PORT", 3306)
@@ -23,16 +34,80 @@ class Config(object):
     DB_NAME = os.getenv("DB_NAME", "exampledb")
 
     uri = f"{DB_DIALECT}://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-    SQLALCHEMY_DATABASE_URI = uri
+    SQLALCHEMY_DATABASE_URI = os.getenv("SQLALCHEMY_DATABASE_URI", uri)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
-    CACHE_TYPE = "redis"
+    # Create the database and tables whenever the app is created. Disable
+    # in production and run "flask init-db" once before starting workers
+    DB_AUTO_CREATE = os.getenv("DB_AUTO_CREATE", "true") == "true"
+
+    # Connection pool of each worker process, see app/utilities/pool.py.
+    # Connections are recycled before MySQL's wait_timeout (8h) closes them
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+    DB_POOL_MAX_OVERFLOW = int(os.getenv("DB_POOL_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 3600))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true") == "true"
+
+    # Read replicas, comma separated URIs, see app/utilities/replicas.py
+    DB_REPLICA_URIS = [uri for uri in os.getenv("DB_REPLICA_URIS", "")
+                       .split(",") if uri]
+    REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", 5))
+
+    CACHE_TYPE = os.getenv("CACHE_TYPE", "redis")
     CACHE_REDIS_HOST = os.getenv("CACHE_REDIS_HOST", "0.0.0.0")
     CACHE_REDIS_PORT = os.getenv("CACHE_REDIS_PORT", 6379)
     CACHE_REDIS_PASSWORD = os.getenv("CACHE_REDIS_PASSWORD", None)
     CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", 30))
+    CACHE_ITEM_MAX_VARIANTS = int(os.getenv("CACHE_ITEM_MAX_VARIANTS", 16))
+
+    # Stampede protection for cached reads
+    CACHE_STALE_TIMEOUT = int(os.getenv("CACHE_STALE_TIMEOUT", 30))
+    CACHE_LOCK_TIMEOUT = int(os.getenv("CACHE_LOCK_TIMEOUT", 10))
+    CACHE_LOCK_WAIT = float(os.getenv("CACHE_LOCK_WAIT", 1))
+    CACHE_EARLY_REFRESH_BETA = float(os.getenv("CACHE_EARLY_REFRESH_BETA", 1))
+
+    # Optional in-process L1 cache in front of CACHE_TYPE (L2)
+    CACHE_L1_ENABLED = os.getenv("CACHE_L1_ENABLED") == "true"
+    CACHE_L1_MAX_ITEMS = int(os.getenv("CACHE_L1_MAX_ITEMS", 1024))
+    CACHE_L1_TIMEOUT = float(os.getenv("CACHE_L1_TIMEOUT", 5))
+    CACHE_L1_CHANNEL = os.getenv("CACHE_L1_CHANNEL", "cache-l1-invalidation")
 
     BCRYPT_LOG_ROUNDS = int(os.getenv("BCRYPT_LOG_ROUNDS", 6))
+    # Password hashing pool of each worker process, processes in sync
+    # mode and native threads in gevent mode, see app/utilities/hashing.py.
+    # 0 workers hashes in the request thread
+    BCRYPT_POOL_WORKERS = int(os.getenv("BCRYPT_POOL_WORKERS", 2))
+    BCRYPT_POOL_MAX_PENDING = int(os.getenv("BCRYPT_POOL_MAX_PENDING", 8))
+    BCRYPT_POOL_WAIT = float(os.getenv("BCRYPT_POOL_WAIT", 5))
+
+    JSON_BACKEND = os.getenv("JSON_BACKEND", "auto")
+
+    COMPRESS_ALGORITHMS = os.getenv("COMPRESS_ALGORITHMS", "br,gzip")
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 4))
+
+    PAGINATION_MAX_LIMIT = int(os.getenv("PAGINATION_MAX_LIMIT", 1000))
+    # exact, cached, estimate, or none, see app/utilities/counting.py
+    PAGINATION_COUNT_MODE = os.getenv("PAGINATION_COUNT_MODE", "exact")
+    PAGINATION_COUNT_CACHE_TIMEOUT = int(
+        os.getenv("PAGINATION_COUNT_CACHE_TIMEOUT", 3600))
+    ALLOW_UNINDEXED_QUERIES = os.getenv("ALLOW_UNINDEXED_QUERIES") == "true"
+
+    BATCH_GET_MAX_IDS = int(os.getenv("BATCH_GET_MAX_IDS", 1000))
+
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+    # Update and delete single items with one statement instead of
+    # loading them through the ORM first, see CRUDMixin.update_by_id.
+    # Skips ORM events and validators, so it is opt in
+    SINGLE_STATEMENT_WRITES = os.getenv("SINGLE_STATEMENT_WRITES") == "true"
+
+    BULK_CHUNK_SIZE = int(os.getenv("BULK_CHUNK_SIZE", 1000))
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 50000))
+    # Items with a password per bulk request, each one is bcrypt hashed
+    BULK_MAX_HASHED_ITEMS = int(os.getenv("BULK_MAX_HASHED_ITEMS", 100))
 
 
 class TestingConfig(Config):
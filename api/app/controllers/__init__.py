@@ -9,6 +9,7 @@ from typing import Tuple
 from flask import Blueprint, Response
 
 from app.controllers.generic import generic_bp
+from app.controllers.metrics import metrics_bp
 from app.utilities.extensions.cache import cache
 
 index_bp = Blueprint("index", __name__)
@@ -29,4 +30,5 @@ def index() -> Tuple[Response, int]:
 blueprints = [
     (index_bp, "/"),
     (generic_bp, "/"),
+    (metrics_bp, "/"),
 ]
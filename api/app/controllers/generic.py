@@ -6,13 +6,23 @@ import json
 from typing import Tuple
 from sqlalchemy.exc import *
 from werkzeug.exceptions import *
-from flask import jsonify, request, Blueprint, Response
+from flask import (current_app, jsonify, request, stream_with_context,
+                   Blueprint, Response)
 
 from app.models import models
 from app.utilities import request_requires
-from app.utilities.extensions.cache import cache
-from app.utilities.helpers import load_json, pagination_dict
+from app.utilities.extensions.db import db
+from app.utilities.caching import (cached_item, cached_list, read_batch,
+                                   write_batch)
+from app.utilities.replicas import read_only
+from app.utilities.helpers import load_json, load_json_list
+from app.utilities.export import csv_chunks, export_formats, ndjson_chunks
+from app.utilities.queries import (apply_filters, apply_sort, parse_fields,
+                                   parse_ids, parse_sort, project)
+from app.utilities.pagination import (cursor_paginate, is_cursor_request,
+                                      page_paginate)
 from app.utilities.responder import Responder
+from app.utilities.validation import ValidationError
 
 generic_bp = Blueprint("generic", __name__)
 
@@ -27,7 +37,7 @@ def create(model:str) -> Tuple[Response, int]:
         model (str): Name of model of the item to create
 
     Raises:
-        BadRequest: Improper/missing POST data
+        ValidationError: Invalid fields, before touching the database
         BadRequest: Model does not exist
         Conflict: Item already exists
 
@@ -35,7 +45,8 @@ def create(model:str) -> Tuple[Response, int]:
         Tuple[Response, int]: Flask Response & HTTP status code
     """
     try:
-        item = models[model](**load_json(request.data))
+        validator = models[model].descriptor().validator
+        item = models[model](**validator(load_json(request.data)))
         item.save()
 
         responder = Responder()
@@ -53,30 +64,42 @@ def create(model:str) -> Tuple[Response, int]:
 
 
 @generic_bp.route("<string:model>/<int:_id>", methods=["GET"])
-@cache.cached()
+@cached_item
+@read_only
 def read_by_id(model:str, _id:int) -> Tuple[Response, int]:
     """
     Get an item in the model DB by ID from URL path and cache the result
+    until it expires or the item is written
 
     Args:
         model (str): Name of model of the item to request by ID
         _id (int): ID of the item being requested
 
+    Query Params:
+        fields (str): Comma separated fields to select, e.g. "id,email"
+
     Raises:
         NotFound: Item does not exist
         BadRequest: Model does not exist
+        BadRequest: Unknown field requested
 
     Returns:
         Tuple[Response, int]: Flask Response & HTTP status code
     """
     try:
-        item = models[model].query.filter_by(id=_id).first()
+        fields = parse_fields(models[model], request.args)
+        query = models[model].query.filter_by(id=_id)
+        item = project(query, models[model], fields).first()
 
         if not item:
             raise NotFound(f"{model} {_id} does not exist")
 
+        serializer = models[model].serializer()
+        if fields:
+            serializer = serializer.subset(fields)
+
         responder = Responder()
-        responder.results.append(item.as_dict)
+        responder.results.append(serializer(item))
         return responder.succeed()
 
     except KeyError:
@@ -84,61 +107,191 @@ def read_by_id(model:str, _id:int) -> Tuple[Response, int]:
 
 
 @generic_bp.route("<string:model>", methods=["GET"])
+@cached_list
+@read_only
 def read_all(model:str) -> Tuple[Response, int]:
     """
-    Get all items in the model (paginated)
+    Get all items in the model (paginated) and cache the result until it
+    expires or any item of the model is written. With ?ids= get those
+    items instead, see read_many().
 
     Args:
         model (str): Name of model of the items
 
     Query Params:
+        ids (str): Comma separated IDs of the items to get, e.g. "1,2,3"
         page (int): Requested page number
         per_page (int): Requested number of items to return per page
+        after (str): Cursor from the "next" pagination value of the
+                     previous page, switches to cursor pagination
+        limit (int): Number of items per page in cursor pagination
+        count (str): How to count the total number of items, "exact",
+                     "cached", "estimate", "none", or a boolean, see
+                     app/utilities/counting.py. Defaults to
+                     PAGINATION_COUNT_MODE for pages, none for cursors.
+        fields (str): Comma separated fields to select, e.g. "id,email"
+        sort (str): Comma separated columns to sort by, prefix with "-"
+                    for descending, e.g. "-name,id"
+        <column>[__<operator>] (str): Filter on an indexed column, see
+                                      app/utilities/queries.py
 
     Raises:
         BadRequest: Model does not exist
+        BadRequest: Unknown field, filter, or sort requested
+        BadRequest: Filter or sort on an unindexed column
 
     Returns:
         Tuple[Response, int]: Flask Response & HTTP status code
     """
+    try:
+        model_cls = models[model]
+    except KeyError:
+        raise BadRequest(f"{model} does not exist")
 
-    @cache.memoize()
-    def get_all_paginated_results(**kwargs) -> Tuple[Response, int]:
-        """
-        You may notice the kwargs object isn't used in this nested
-        function, it is only used by the cache.memoize decorator, so
-        that the results for pagination query params like 
-        "?per_page=2&page=4" aren't cached the same as others like:
-        "?per_page=3&page=2".
+    if "ids" in request.args:
+        return read_many(model, model_cls)
 
-        Note: It may be faster/better to un-nest this later
+    sort = parse_sort(model_cls, request.args)
+    fields = parse_fields(model_cls, request.args,
+                          include=[column.key for column, _ in sort])
+    query = apply_filters(model_cls.query, model_cls, request.args)
+    query = project(query, model_cls, fields)
+    if is_cursor_request(request.args):
+        items, pagination = cursor_paginate(query, model_cls, sort,
+                                            request.args)
+    else:
+        items, pagination = page_paginate(apply_sort(query, sort), model_cls,
+                                          request.args)
 
-        Returns:
-            Tuple[Response, int]: Flask Response & HTTP status code
-        """
+    serializer = model_cls.serializer()
+    if fields:
+        serializer = serializer.subset(fields)
 
-        results = models[model].query.paginate(error_out=False)
+    responder = Responder()
+    responder.results += [serializer(item) for item in items]
+    responder.pagination = pagination
 
-        if not results:
-            return Responder().succeed(msg=f"No {model} results found")
+    return responder.succeed()
 
-        responder = Responder()
-        responder.results += [item.as_dict for item in results.items]
-        responder.pagination = pagination_dict(results)
 
-        return responder.succeed()
+def read_many(model:str, model_cls:type) -> Tuple[Response, int]:
+    """
+    Get many items by ID with one cache multi-get for the serialized
+    items and one `SELECT ... WHERE id IN (...)` for the IDs which
+    missed, then backfill the cache with the missed items. Serves
+    read_all requests with ?ids=.
+
+    Args:
+        model (str): Name of model of the items
+        model_cls (type): Model class of the items
+
+    Query Params:
+        ids (str): Comma separated IDs of the items to get, e.g. "1,2,3"
+        fields (str): Comma separated fields to select, e.g. "id,email"
+
+    Raises:
+        BadRequest: Invalid, missing, or too many IDs
+        BadRequest: Unknown field requested
+
+    Returns:
+        Tuple[Response, int]: Flask Response & HTTP status code, with the
+                              found items in the requested order and the
+                              IDs which don't exist as "not_found"
+    """
+    ids = parse_ids(model_cls, request.args,
+                    current_app.config["BATCH_GET_MAX_IDS"])
+    fields = parse_fields(model_cls, request.args)
+
+    descriptor = model_cls.descriptor()
+    found, missed, since = read_batch(descriptor, ids)
+    if missed:
+        serializer = model_cls.serializer()
+        query = model_cls.query.filter(model_cls.id.in_(missed))
+        loaded = {item.id: serializer(item) for item in query}
+        write_batch(descriptor, loaded, since)
+        found.update(loaded)
+
+    responder = Responder()
+    for _id in ids:
+        item = found.get(_id)
+        if item is not None:
+            responder.results.append(item if not fields else
+                                     {key: item[key] for key in fields})
+    responder.not_found = [_id for _id in ids if _id not in found]
+    return responder.succeed()
+
+
+@generic_bp.route("<string:model>/_export", methods=["GET"])
+@read_only
+def export(model:str) -> Tuple[Response, int]:
+    """
+    Stream every item in the model as NDJSON or CSV. Rows are read with
+    a server side cursor in batches of EXPORT_BATCH_SIZE and written to
+    the client as they arrive, so memory use stays flat regardless of
+    the size of the table.
+
+    Args:
+        model (str): Name of model of the items
 
+    Query Params:
+        format (str): "ndjson" (default) or "csv"
+        fields (str): Comma separated fields to select, e.g. "id,email"
+        sort (str): Comma separated columns to sort by, prefix with "-"
+                    for descending, e.g. "-name,id"
+        <column>[__<operator>] (str): Filter on an indexed column, see
+                                      app/utilities/queries.py
+
+    Raises:
+        BadRequest: Model does not exist
+        BadRequest: Unknown format
+        BadRequest: Unknown field, filter, or sort requested
+        BadRequest: Filter or sort on an unindexed column
+
+    Returns:
+        Tuple[Response, int]: Streamed Flask Response & HTTP status code
+    """
     try:
-        return get_all_paginated_results(**dict(request.args))
+        model_cls = models[model]
     except KeyError:
         raise BadRequest(f"{model} does not exist")
 
+    export_format = request.args.get("format", "ndjson")
+    if export_format not in export_formats:
+        raise BadRequest(f"Unknown format {export_format}, use one of "
+                         f"{list(export_formats)}")
+
+    sort = parse_sort(model_cls, request.args)
+    fields = parse_fields(model_cls, request.args,
+                          include=[column.key for column, _ in sort])
+    query = apply_filters(model_cls.query, model_cls, request.args)
+    query = apply_sort(project(query, model_cls, fields), sort)
+    rows = query.execution_options(stream_results=True) \
+                .yield_per(current_app.config["EXPORT_BATCH_SIZE"])
+
+    serializer = model_cls.serializer()
+    if fields:
+        serializer = serializer.subset(fields)
+
+    if export_format == "csv":
+        chunks = csv_chunks(rows, serializer)
+    else:
+        encoder = current_app.extensions["json_encoder"]
+        chunks = ndjson_chunks(rows, serializer, encoder)
+
+    response = Response(stream_with_context(chunks),
+                        mimetype=export_formats[export_format])
+    response.headers["Content-Disposition"] = \
+        f"attachment; filename={model}.{export_format}"
+    return (response, 200)
+
 
 @generic_bp.route("<string:model>/<int:_id>", methods=["PUT"])
 @request_requires.headers({"Content-Type": "application/json"})
 def update(model:str, _id:int) -> Tuple[Response, int]:
     """
-    Update model item's record in the database by ID
+    Update model item's record in the database by ID, with a single
+    UPDATE statement when SINGLE_STATEMENT_WRITES is set or by loading
+    and saving it through the ORM otherwise
 
     Args:
         model (str): Name of model of the item to update by ID
@@ -146,6 +299,7 @@ def update(model:str, _id:int) -> Tuple[Response, int]:
 
     Raises:
         NotFound: Item does not exist
+        ValidationError: Invalid fields
         BadRequest: Improper/missing POST data
         BadRequest: Model does not exist
         Conflict: Item in updated state already exists (idempotency)
@@ -154,8 +308,20 @@ def update(model:str, _id:int) -> Tuple[Response, int]:
         Tuple[Response, int]: Flask Response & HTTP status code
     """
     try:
+        data = load_json(request.data)
+        if current_app.config["SINGLE_STATEMENT_WRITES"]:
+            if not models[model].update_by_id(_id, **data):
+                raise NotFound(f"{model} {_id} does not exist")
+            return Responder().succeed(msg=f"Updated {model} {_id}")
+
         item = models[model].query.filter_by(id=_id).first()
-        item.update(id=_id, **load_json(request.data))
+
+        if not item:
+            raise NotFound(f"{model} {_id} does not exist")
+
+        # Prepared (e.g. hashed) only once the item is known to exist
+        values = models[model].prepare_values(partial=True, **data)
+        item.update(id=_id, **values)
 
         return Responder().succeed(msg=f"Updated {model} {_id}")
 
@@ -175,7 +341,9 @@ def update(model:str, _id:int) -> Tuple[Response, int]:
 @generic_bp.route("<string:model>/<int:_id>", methods=["DELETE"])
 def delete(model:str, _id:int) -> Tuple[Response, int]:
     """
-    Delete model item's record from the database by ID
+    Delete model item's record from the database by ID, with a single
+    DELETE statement when SINGLE_STATEMENT_WRITES is set or by loading
+    and deleting it through the ORM otherwise
 
     Args:
         model (str): Name of model of the item to delete by ID
@@ -189,6 +357,11 @@ def delete(model:str, _id:int) -> Tuple[Response, int]:
         Tuple[Response, int]: Flask Response & HTTP status code
     """
     try:
+        if current_app.config["SINGLE_STATEMENT_WRITES"]:
+            if not models[model].delete_by_id(_id):
+                raise NotFound(f"{model} {_id} does not exist")
+            return Responder().succeed(msg=f"Deleted {model} {_id}!")
+
         item = models[model].query.filter_by(id=_id).first()
 
         if not item:
@@ -200,3 +373,138 @@ def delete(model:str, _id:int) -> Tuple[Response, int]:
 
     except KeyError:
         raise BadRequest(f"{model} does not exist")
+
+
+@generic_bp.route("<string:model>/_bulk", methods=["POST"])
+@request_requires.headers({"Content-Type": "application/json"})
+def bulk_create(model:str) -> Tuple[Response, int]:
+    """
+    Create many model items in a single transaction using chunked
+    multi-row INSERT statements. The whole payload is validated before
+    anything is written.
+
+    Args:
+        model (str): Name of model of the items to create
+
+    Raises:
+        BadRequest: Improper/missing POST data
+        ValidationError: Invalid fields of any item, by index
+        RequestEntityTooLarge: Too many passwords to hash, see
+                               BULK_MAX_HASHED_ITEMS
+        BadRequest: Model does not exist
+
+    Returns:
+        Tuple[Response, int]: Flask Response & HTTP status code, with a
+                              result per item (201 created, 409 conflict)
+    """
+    try:
+        model_cls = models[model]
+    except KeyError:
+        raise BadRequest(f"{model} does not exist")
+
+    config = current_app.config
+    items = load_json_list(request.data, config["BULK_MAX_ITEMS"])
+
+    rows, invalid = model_cls.prepare_many(items)
+    if invalid:
+        raise ValidationError(invalid)
+
+    created = model_cls.bulk_create(rows, config["BULK_CHUNK_SIZE"])
+    db.session.commit()
+
+    responder = Responder()
+    responder.results = [{"index": i, "http_code": 201 if ok else 409}
+                         for i, ok in enumerate(created)]
+    return responder.succeed(
+        msg=f"Created {sum(created)} of {len(items)} {model}")
+
+
+@generic_bp.route("<string:model>/_bulk", methods=["PUT"])
+@request_requires.headers({"Content-Type": "application/json"})
+def bulk_update(model:str) -> Tuple[Response, int]:
+    """
+    Update many model items by ID in a single transaction using chunked
+    multi-row UPDATE statements. Each item must include its "id". The
+    whole payload is validated before anything is written.
+
+    Args:
+        model (str): Name of model of the items to update
+
+    Raises:
+        BadRequest: Improper/missing POST data
+        ValidationError: Invalid fields or missing ID of any item, by index
+        RequestEntityTooLarge: Too many passwords to hash, see
+                               BULK_MAX_HASHED_ITEMS
+        BadRequest: Model does not exist
+
+    Returns:
+        Tuple[Response, int]: Flask Response & HTTP status code, with a
+                              result per item (200 updated, 404 not found,
+                              409 conflict)
+    """
+    try:
+        model_cls = models[model]
+    except KeyError:
+        raise BadRequest(f"{model} does not exist")
+
+    config = current_app.config
+    items = load_json_list(request.data, config["BULK_MAX_ITEMS"])
+
+    # Checked first so nothing is prepared (e.g. hashed) for a bad payload
+    pk = model_cls.descriptor().pk.key
+    invalid = [{"index": index, "field": pk, "error": "is required"}
+               for index, item in enumerate(items)
+               if isinstance(item, dict) and pk not in item]
+    if not invalid:
+        rows, invalid = model_cls.prepare_many(items, partial=True)
+    if invalid:
+        raise ValidationError(invalid)
+
+    statuses = model_cls.bulk_update(rows, config["BULK_CHUNK_SIZE"])
+    db.session.commit()
+
+    responder = Responder()
+    responder.results = [{"index": i, "id": row["id"], "http_code": status}
+                         for i, (row, status) in enumerate(zip(rows, statuses))]
+    updated = statuses.count(200)
+    return responder.succeed(msg=f"Updated {updated} of {len(items)} {model}")
+
+
+@generic_bp.route("<string:model>/_bulk", methods=["DELETE"])
+@request_requires.headers({"Content-Type": "application/json"})
+def bulk_delete(model:str) -> Tuple[Response, int]:
+    """
+    Delete many model items by a JSON array of integer IDs in a single
+    transaction using chunked `DELETE ... WHERE id IN (...)` statements.
+    Repeated IDs are deleted once, their repeats report 404.
+
+    Args:
+        model (str): Name of model of the items to delete
+
+    Raises:
+        BadRequest: Improper/missing POST data
+        BadRequest: Model does not exist
+
+    Returns:
+        Tuple[Response, int]: Flask Response & HTTP status code, with a
+                              result per ID (200 deleted, 404 not found,
+                              409 conflict)
+    """
+    try:
+        model_cls = models[model]
+    except KeyError:
+        raise BadRequest(f"{model} does not exist")
+
+    config = current_app.config
+    ids = load_json_list(request.data, config["BULK_MAX_ITEMS"])
+    if not all(type(_id) is int for _id in ids):
+        raise BadRequest(f"Improper/missing POST data, expected a list of IDs")
+
+    statuses = model_cls.bulk_delete(ids, config["BULK_CHUNK_SIZE"])
+    db.session.commit()
+
+    responder = Responder()
+    responder.results = [{"index": i, "id": _id, "http_code": status}
+                         for i, (_id, status) in enumerate(zip(ids, statuses))]
+    deleted = statuses.count(200)
+    return responder.succeed(msg=f"Deleted {deleted} of {len(ids)} {model}")
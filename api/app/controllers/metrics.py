@@ -0,0 +1,22 @@
+"""
+Metrics controller, scraped by Prometheus
+"""
+
+from flask import Blueprint, Response
+
+from app.utilities import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+@metrics_bp.route("metrics", methods=["GET"])
+def read_metrics() -> Response:
+    """
+    Get the current values of the metrics of every worker in the
+    Prometheus text format
+
+    Returns:
+        Response: Flask Response
+    """
+    return Response(metrics.exposition(), status=200,
+                    content_type=metrics.CONTENT_TYPE_LATEST)
@@ -4,9 +4,13 @@ registering extensions, blueprints, error handlers, and initializing
 the database
 """
 
+import os
+import logging
 from app import config
 from flask import Flask
 
+serving_modes = ("sync", "gevent")
+
 
 def create_app(conf_obj_name: str) -> Flask:
     """
@@ -22,23 +26,105 @@ def create_app(conf_obj_name: str) -> Flask:
     app = Flask(__name__)
     config_import_str = f"app.config.{conf_obj_name}Config"
     app.config.from_object(config_import_str)
+    select_serving_mode(app)
+    register_instrumentation(app)
     register_blueprints(app)
     register_extensions(app)
+    register_profiler(app)
+    register_json_encoder(app)
     register_error_handlers(app)
-    initialize_database(app)
+    register_compression(app)
+    register_replica_routing(app)
+    register_commands(app)
+    if app.config["DB_AUTO_CREATE"]:
+        initialize_database(app)
     return app
 
 
+def select_serving_mode(app):
+    """
+    Prepare the process for the configured SERVING_MODE
+
+    "gevent" serves each request in a greenlet. PyMySQL and redis-py are
+    pure Python so once the standard library is monkey patched their
+    socket I/O yields to other requests instead of blocking the worker.
+    The gunicorn gevent worker (see gunicorn_conf.py) patches before the
+    app is imported, otherwise it is patched here as late as possible.
+    """
+    mode = app.config["SERVING_MODE"]
+    if mode not in serving_modes:
+        raise ValueError(f"Serving mode {mode} is not one of {serving_modes}")
+    if mode != "gevent":
+        return
+
+    from gevent import monkey
+    if not monkey.is_module_patched("socket"):
+        logging.getLogger(__name__).warning(
+            "gevent serving mode without a gevent worker, monkey patching "
+            "after import, run with gunicorn -c gunicorn_conf.py instead")
+        monkey.patch_all()
+
+
+def register_instrumentation(app):
+    """
+    Register request metrics, registered first so they are recorded after
+    every other after_request handler
+    """
+    from app.utilities.instrumentation import record_request, start_request
+    app.before_request(start_request)
+    app.after_request(record_request)
+
+
+def register_profiler(app):
+    """
+    Register the request profiler if any request can be profiled
+    """
+    from app.utilities.extensions.cache import cache
+    from app.utilities.profiler import (finish_profile, start_profile,
+                                        ProfiledCache)
+    settings = app.config
+    if not (settings["PROFILE_ENABLED"] or settings["SECRET_KEY"]
+            or settings["PROFILE_SAMPLE_RATE"] > 0):
+        return
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    backends = app.extensions["cache"]
+    backends[cache] = ProfiledCache(backends[cache])
+
+
 def register_extensions(app):
     """
     Register all Flask extensions
     """
     from app.utilities.extensions.db import db
     from app.utilities.extensions.cache import cache
-    from app.utilities.extensions.migrate import migrate
+    from app.utilities.pool import pool_options
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+        **pool_options(app.config),
+        **app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})}
+    if app.config["CACHE_L1_ENABLED"]:
+        app.config.setdefault("CACHE_L2_TYPE", app.config["CACHE_TYPE"])
+        app.config["CACHE_TYPE"] = "app.utilities.cache_backends.two_tier"
+    from app.utilities.replicas import replica_binds
+    app.config["SQLALCHEMY_BINDS"] = {
+        **replica_binds(app.config["DB_REPLICA_URIS"]),
+        **(app.config.get("SQLALCHEMY_BINDS") or {})}
     db.init_app(app)
     cache.init_app(app)
-    migrate.init_app(app, db)
+
+    # Migrations are only needed by "flask db", skip importing alembic
+    # when booting workers
+    if os.getenv("FLASK_RUN_FROM_CLI") == "true":
+        from app.utilities.extensions.migrate import migrate
+        migrate.init_app(app, db)
+
+def register_json_encoder(app):
+    """
+    Register the JSON encoder backend used by the Responder
+    """
+    from app.utilities.encoders import get_encoder
+    app.extensions["json_encoder"] = get_encoder(app.config["JSON_BACKEND"])
+
 
 def register_blueprints(app):
     """
@@ -56,9 +142,45 @@ def register_error_handlers(app):
     [app.register_error_handler(hk, hv) for hk, hv in error_handlers.items()]
 
 
+def register_compression(app):
+    """
+    Register response compression
+    """
+    from app.utilities.compression import compress_response
+    app.after_request(compress_response)
+
+
+def register_replica_routing(app):
+    """
+    Route read only views to the read replicas, if any
+    """
+    import itertools
+    from app.utilities.replicas import replica_binds, stick_after_write
+    binds = list(replica_binds(app.config["DB_REPLICA_URIS"]))
+    if binds:
+        app.extensions["replicas"] = itertools.cycle(binds)
+        app.after_request(stick_after_write)
+
+
+def register_commands(app):
+    """
+    Register CLI commands, run with e.g.
+    FLASK_APP='app.factory:create_app("Prod")' flask init-db
+    """
+    import click
+
+    @app.cli.command("init-db")
+    def init_db():
+        """Create the database and any missing tables"""
+        initialize_database(app)
+        click.echo("Database initialized")
+
+
 def initialize_database(app):
     """
-    Initialize the database.
+    Initialize the database. Probes for the database and every table, so
+    it is run once by "flask init-db" in production rather than by every
+    worker, see DB_AUTO_CREATE.
     """
     from app.utilities.extensions.db import db
     from app.utilities.database import create_db
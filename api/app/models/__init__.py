@@ -2,10 +2,16 @@
 All Models are listed here for import or dynamic/generic use
 """
 
+from types import MappingProxyType
 from app.models.users import Users
 from app.models.fruits import Fruits
 
-models = {
+models = MappingProxyType({
     "users": Users,
     "fruits": Fruits,
-}
\ No newline at end of file
+})
+
+# Build each model's descriptor (columns, indexes, serializer) once, up
+# front, instead of per request
+descriptors = MappingProxyType({name: model.descriptor()
+                                for name, model in models.items()})
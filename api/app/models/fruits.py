@@ -3,8 +3,6 @@ Generic Model
 """
 
 from app.utilities.extensions.db import db
-from app.utilities.extensions.cache import cache
-from app.utilities.helpers import pagination_dict
 from app.utilities.database import Model, Column, String, Integer, ForeignKey
 
 
@@ -3,10 +3,14 @@ Users Model
 """
 
 from datetime import datetime as dt
+from typing import List, Tuple
 from flask import current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+from app.utilities import hashing
 from app.utilities.extensions.db import db
-from app.utilities.extensions.bcrypt import bcrypt
-from app.utilities.database import Model, Column, String, Integer, ForeignKey
+from app.utilities.validation import ValidationError
+from app.utilities.database import (invalid_items, Model, Column, String,
+                                    Integer, ForeignKey)
 
 
 class Users(Model):
@@ -24,6 +28,10 @@ class Users(Model):
     """
 
     __tablename__ = __qualname__.lower()
+    __serialize_exclude__ = ("password",)
+    # Passwords are given in plain text and hashed by the model
+    __input_types__ = {"password": str}
+    __min_lengths__ = {"password": 1}
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     email = Column(db.String(128), unique=True, nullable=False)
@@ -40,6 +48,78 @@ class Users(Model):
             self.password = None
 
 
+    @classmethod
+    def prepare_values(cls, partial:bool=False, **kwargs) -> dict:
+        """
+        Validate column values and hash the password when one is given
+        so it is never written to the table in plain text. Empty
+        passwords are rejected by the validator, see __min_lengths__.
+
+        Args:
+            partial (bool, optional): Skip the required columns check,
+                                      used for updates. Defaults to False.
+
+        Raises:
+            ValidationError: Invalid fields
+
+        Returns:
+            dict: Column values ready to be written to the table
+        """
+        values = super().prepare_values(partial=partial, **kwargs)
+        if values.get("password"):
+            password = str(values["password"])
+            values["password"] = hashing.generate_password_hash(password)
+        return values
+
+
+    @classmethod
+    def prepare_many(cls, items: List[dict],
+                     partial: bool=False) -> Tuple[List[dict], List[dict]]:
+        """
+        Validate the column values of many users, then hash all of their
+        passwords concurrently in the hashing pool. Nothing is hashed if
+        any item is invalid.
+
+        Args:
+            items (List[dict]): Keyword arguments of each user
+            partial (bool, optional): Skip the required columns check,
+                                      used for updates. Defaults to False.
+
+        Raises:
+            RequestEntityTooLarge: More than BULK_MAX_HASHED_ITEMS items
+                                   have a password to hash
+
+        Returns:
+            Tuple[List[dict], List[dict]]: Column values of each valid
+                                           user & errors of invalid users,
+                                           see invalid_items()
+        """
+        max_hashed = current_app.config["BULK_MAX_HASHED_ITEMS"]
+        hashed = sum(1 for item in items
+                     if isinstance(item, dict) and item.get("password"))
+        if hashed > max_hashed:
+            raise RequestEntityTooLarge(
+                f"Too many passwords to hash, max is {max_hashed} per "
+                f"request.")
+
+        validator = cls.descriptor().validator
+        rows, invalid = [], []
+        for index, item in enumerate(items):
+            try:
+                rows.append(validator(item, partial=partial))
+            except ValidationError as error:
+                invalid += invalid_items(index, error)
+        if invalid:
+            return rows, invalid
+
+        with_password = [row for row in rows if row.get("password")]
+        hashes = hashing.generate_password_hashes(
+            [str(row["password"]) for row in with_password])
+        for row, pw_hash in zip(with_password, hashes):
+            row["password"] = pw_hash
+        return rows, invalid
+
+
     def set_password(self, password: str):
         """
         Set user password hash
@@ -47,7 +127,7 @@ class Users(Model):
         Args:
             password (str): Entered user password
         """
-        self.password = bcrypt.generate_password_hash(password)
+        self.password = hashing.generate_password_hash(password)
 
 
     def check_password(self, value: str) -> bool:
@@ -60,7 +140,7 @@ class Users(Model):
         Returns:
             bool: True if password is correct, False otherwise
         """
-        return bcrypt.check_password_hash(self.password, str(value))
+        return hashing.check_password_hash(self.password, str(value))
 
 
     def __repr__(self) -> str:
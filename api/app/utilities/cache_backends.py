@@ -0,0 +1,296 @@
+"""
+Custom Flask-Caching backends
+
+Two tier cache: a small in-process LRU cache (L1) in front of the
+configured backend (L2, usually redis). L1 hits skip the network round
+trip and deserialization entirely.
+
+Coherence with writes:
+    - Any write through this backend (set, add, delete, inc, ...) evicts
+      the key from the local L1 and is written through to L2.
+    - When L2 is redis the written keys are also published on the
+      CACHE_L1_CHANNEL pub/sub channel. Every process subscribes to it
+      and evicts those keys from its own L1.
+    - L1 entries also expire after CACHE_L1_TIMEOUT seconds, which bounds
+      staleness if an invalidation message is ever missed.
+
+Enable with CACHE_L1_ENABLED, the backend set by CACHE_TYPE becomes L2.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from collections import OrderedDict
+from werkzeug.utils import import_string
+from flask_caching.backends.base import BaseCache
+from flask_caching.backends.rediscache import RedisCache
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache(object):
+    """
+    Thread safe, size bounded, least recently used cache whose entries
+    expire after a fixed number of seconds
+
+    Args:
+        max_items (int): Maximum number of entries kept
+        timeout (float): Seconds an entry is kept
+    """
+
+
+    def __init__(self, max_items: int, timeout: float):
+        self.max_items = max_items
+        self.timeout = timeout
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def get(self, key: str) -> object:
+        """
+        Get an entry and mark it as most recently used
+
+        Args:
+            key (str): Key of the entry
+
+        Returns:
+            object: Value or None if missing or expired
+        """
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+
+    def set(self, key: str, value: object):
+        """
+        Set an entry, evicting the least recently used one when full
+
+        Args:
+            key (str): Key of the entry
+            value (object): Value, None is never stored
+        """
+        if value is None:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.timeout, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
+
+
+    def delete(self, *keys: str):
+        """
+        Delete entries
+
+        Args:
+            *keys (str): Keys of the entries
+        """
+        with self._lock:
+            for key in keys:
+                self._items.pop(key, None)
+
+
+    def clear(self):
+        """
+        Delete all entries
+        """
+        with self._lock:
+            self._items.clear()
+
+
+class TwoTierCache(BaseCache):
+    """
+    Flask-Caching backend with an in-process LRU cache in front of
+    another backend
+
+    Args:
+        l2 (BaseCache): Backend to put the L1 cache in front of
+        max_items (int): Maximum number of L1 entries per process
+        l1_timeout (float): Seconds an L1 entry is kept
+        channel (str, optional): Redis pub/sub channel used to evict L1
+                                 entries in other processes. Defaults to
+                                 None which only evicts locally.
+    """
+
+
+    def __init__(self, l2: BaseCache, max_items: int, l1_timeout: float,
+                 channel: str=None):
+        super(TwoTierCache, self).__init__(default_timeout=l2.default_timeout)
+        self.l1 = LRUCache(max_items, l1_timeout)
+        self.l2 = l2
+        self.channel = channel
+        self._subscriber_pid = None
+        self._subscriber_lock = threading.Lock()
+
+
+    def _ensure_subscriber(self):
+        """
+        Start the invalidation subscriber thread of this process. Started
+        lazily so each forked worker gets its own.
+        """
+        if not self.channel or self._subscriber_pid == os.getpid():
+            return
+        with self._subscriber_lock:
+            if self._subscriber_pid == os.getpid():
+                return
+            self.l1.clear()
+            thread = threading.Thread(target=self._listen, daemon=True,
+                                      name="cache-l1-invalidation")
+            thread.start()
+            self._subscriber_pid = os.getpid()
+
+
+    def _listen(self):
+        """
+        Evict keys published on the invalidation channel from L1 forever,
+        reconnecting on errors. L1 is cleared whenever the subscription
+        is (re)established since messages may have been missed.
+        """
+        while True:
+            try:
+                pubsub = self.l2._write_client.pubsub(
+                    ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                self.l1.clear()
+                for message in pubsub.listen():
+                    keys = json.loads(message["data"])
+                    if keys == "*":
+                        self.l1.clear()
+                    else:
+                        self.l1.delete(*keys)
+            except Exception:
+                logger.exception("Cache L1 invalidation subscriber failed")
+                self.l1.clear()
+                time.sleep(1)
+
+
+    def _evict(self, *keys: str):
+        """
+        Evict keys from the L1 of this and every other process
+
+        Args:
+            *keys (str): Keys to evict or "*" to clear everything
+        """
+        if keys == ("*",):
+            self.l1.clear()
+        else:
+            self.l1.delete(*keys)
+        if self.channel:
+            message = "*" if keys == ("*",) else list(keys)
+            self.l2._write_client.publish(self.channel, json.dumps(message))
+
+
+    def get(self, key):
+        """Get from L1, falling back to L2 and filling L1"""
+        self._ensure_subscriber()
+        value = self.l1.get(key)
+        if value is None:
+            value = self.l2.get(key)
+            self.l1.set(key, value)
+        return value
+
+
+    def get_many(self, *keys):
+        """Get many from L1, falling back to L2 for misses"""
+        self._ensure_subscriber()
+        values = [self.l1.get(key) for key in keys]
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing:
+            found = dict(zip(missing, self.l2.get_many(*missing)))
+            for key, value in found.items():
+                self.l1.set(key, value)
+            values = [found[key] if value is None else value
+                      for key, value in zip(keys, values)]
+        return values
+
+
+    def has(self, key):
+        """Check L1 then L2 for a key"""
+        return self.l1.get(key) is not None or self.l2.has(key)
+
+
+    def set(self, key, value, timeout=None):
+        """Write through to L2 and evict from every L1"""
+        result = self.l2.set(key, value, timeout=timeout)
+        self._evict(key)
+        return result
+
+
+    def add(self, key, value, timeout=None):
+        """Add to L2 and evict from every L1 if added"""
+        result = self.l2.add(key, value, timeout=timeout)
+        if result:
+            self._evict(key)
+        return result
+
+
+    def set_many(self, mapping, timeout=None):
+        """Write many through to L2 and evict from every L1"""
+        result = self.l2.set_many(mapping, timeout=timeout)
+        self._evict(*mapping)
+        return result
+
+
+    def delete(self, key):
+        """Delete from L2 and every L1"""
+        result = self.l2.delete(key)
+        self._evict(key)
+        return result
+
+
+    def delete_many(self, *keys):
+        """Delete many from L2 and every L1"""
+        result = self.l2.delete_many(*keys)
+        self._evict(*keys)
+        return result
+
+
+    def inc(self, key, delta=1):
+        """Increment in L2 and evict from every L1"""
+        result = self.l2.inc(key, delta=delta)
+        self._evict(key)
+        return result
+
+
+    def dec(self, key, delta=1):
+        """Decrement in L2 and evict from every L1"""
+        result = self.l2.dec(key, delta=delta)
+        self._evict(key)
+        return result
+
+
+    def clear(self):
+        """Clear L2 and every L1"""
+        result = self.l2.clear()
+        self._evict("*")
+        return result
+
+
+def two_tier(app, config, args, kwargs):
+    """
+    Flask-Caching backend factory, set CACHE_TYPE to
+    "app.utilities.cache_backends.two_tier" to use it. The L2 backend is
+    created from CACHE_L2_TYPE like CACHE_TYPE normally would be.
+    """
+    l2_type = config["CACHE_L2_TYPE"]
+    if "." not in l2_type:
+        from flask_caching import backends
+        l2_factory = getattr(backends, l2_type)
+    else:
+        l2_factory = import_string(l2_type)
+    l2 = l2_factory(app, config, args, kwargs)
+
+    channel = None
+    if isinstance(l2, RedisCache):
+        channel = config["CACHE_L1_CHANNEL"]
+    return TwoTierCache(l2, config["CACHE_L1_MAX_ITEMS"],
+                        config["CACHE_L1_TIMEOUT"], channel)
@@ -0,0 +1,548 @@
+"""
+Write-aware caching for the generic controller.
+
+Cache layout (keys are also prefixed by the backend's CACHE_KEY_PREFIX),
+built from the model's descriptor and namespaced by its table name so
+keys built from a URL and keys built from a written instance match:
+    <table>:item:<id>          All cached responses of one item, as a dict
+                               of {query string variant: cached response}
+    <table>:batch:<id>         The serialized item, for batch gets by ?ids=
+    <table>:generation         Generation counter of the model
+    <table>:written            Time of the model's last write, in
+                               microseconds (see app/utilities/replicas.py)
+    <table>:list:<gen>:<hash>  A cached read_all page, <gen> being the
+                               model's generation when it was cached
+    <table>:count:<gen>:<hash> A cached count, see app/utilities/counting.py
+
+Every write flushed through the session (CRUDMixin save/update/delete)
+or marked with mark_stale() (bulk and single statement writes) evicts
+exactly the affected item entries and bumps the model's generation once
+the transaction commits, which retires all of the model's cached list
+pages without having to find them.
+
+A request which read an item before a write commits may cache it after
+the write evicted it. Item entries are therefore only kept if the
+model's generation, read before the item was computed, didn't change
+meanwhile (see compute_record()), so long timeouts never keep serving an
+item from before a write.
+
+Stampede protection - cached responses are kept CACHE_STALE_TIMEOUT
+seconds past their CACHE_DEFAULT_TIMEOUT expiry. When a response is
+missing, stale, or picked for early refresh only the request holding a
+short lived lock recomputes it:
+    - stale: the others keep serving the stale response meanwhile
+    - missing: the others wait up to CACHE_LOCK_WAIT seconds for it
+    - early refresh: responses are randomly recomputed shortly before
+      they expire, more likely the closer to expiry and the slower they
+      were to compute (probabilistic early expiration, "XFetch")
+
+Conditional GETs - every cached response carries a strong ETag hashed
+from its body when it is cached. A request whose If-None-Match matches
+the cached ETag gets a 304 Not Modified straight from the cache, without
+touching the database or re-serializing anything.
+
+Compression - cached responses are also stored already compressed with
+every available content encoding (see app/utilities/compression.py), so
+a cache hit is served compressed without being recompressed.
+"""
+
+import math
+import time
+import random
+import hashlib
+from functools import wraps
+from typing import Callable, Iterable, List, Tuple
+from flask import current_app, request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.inspection import inspect
+from app.utilities.metrics import Counter
+from app.utilities.compression import compress_all, negotiate
+from app.utilities.extensions.db import db
+from app.utilities.extensions.cache import cache
+from app.utilities.registry import ModelDescriptor
+
+lock_waits = Counter("cache_lock_waits_total",
+                     "Requests which waited for another to compute a "
+                     "missing cached response", ("view",))
+stale_serves = Counter("cache_stale_serves_total",
+                       "Stale cached responses served while another "
+                       "request recomputed them", ("view",))
+recomputes = Counter("cache_recomputes_total",
+                     "Cached responses computed", ("view",))
+lookups = Counter("cache_lookups_total",
+                  "Cache lookups by view and result (hit, stale, miss)",
+                  ("view", "result"))
+
+# Seconds a generation is kept. Not 0 ("never expire"), since add() with
+# a timeout of 0 expires the key at once on Redis. An expired generation
+# is restarted at a newer value, so expiring only retires list pages.
+generation_timeout = 30 * 24 * 3600
+
+
+def item_key(descriptor: ModelDescriptor, _id: object) -> str:
+    """
+    Cache key of an item's entry
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+        _id (object): ID of the item
+
+    Returns:
+        str: Cache key
+    """
+    return f"{descriptor.table}:item:{_id}"
+
+
+def batch_key(descriptor: ModelDescriptor, _id: object) -> str:
+    """
+    Cache key of an item's serialized item, for batch gets
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+        _id (object): ID of the item
+
+    Returns:
+        str: Cache key
+    """
+    return f"{descriptor.table}:batch:{_id}"
+
+
+def generation_key(descriptor: ModelDescriptor) -> str:
+    """
+    Cache key of a model's generation counter
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+
+    Returns:
+        str: Cache key
+    """
+    return f"{descriptor.table}:generation"
+
+
+def written_key(descriptor: ModelDescriptor) -> str:
+    """
+    Cache key of the time of a model's last write
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+
+    Returns:
+        str: Cache key
+    """
+    return f"{descriptor.table}:written"
+
+
+def new_generation() -> int:
+    """
+    Create a new generation value. Time based so a counter that was
+    evicted never restarts at a value which was already used.
+
+    Returns:
+        int: Generation value
+    """
+    return int(time.time() * 1000000)
+
+
+def generation(descriptor: ModelDescriptor) -> int:
+    """
+    Get the current generation of a model, starting one if needed. When
+    the cache can't store it the new generation is used for this request
+    only, so the value is never None.
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+
+    Returns:
+        int: Generation value
+    """
+    key = generation_key(descriptor)
+    value = cache.get(key)
+    if value is None:
+        value = new_generation()
+        cache.add(key, value, timeout=generation_timeout)
+        # Another request may have started the generation first
+        stored = cache.get(key)
+        if stored is not None:
+            value = stored
+    return value
+
+
+def list_key(descriptor: ModelDescriptor) -> str:
+    """
+    Cache key of the read_all page for the current request
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+
+    Returns:
+        str: Cache key
+    """
+    return (f"{descriptor.table}:list:{generation(descriptor)}:"
+            f"{query_variant()}")
+
+
+def query_variant() -> str:
+    """
+    Hash the current request's query params so param order does not
+    matter, e.g. "?a=1&b=2" and "?b=2&a=1" share a variant
+
+    Returns:
+        str: Hash of the query params
+    """
+    args = tuple(sorted(request.args.items(multi=True)))
+    return hashlib.md5(str(args).encode("utf-8")).hexdigest()
+
+
+def invalidate(descriptor: ModelDescriptor, ids: Iterable=()):
+    """
+    Evict the entries of items and retire the cached list pages of a
+    model by bumping its generation, recording the time of the write
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+        ids (Iterable, optional): IDs of the items to evict. Defaults to ().
+    """
+    # Bumped before the items are evicted, so a request which computed
+    # an item from the old row and cached it after the eviction sees the
+    # new generation and drops it again, see compute_record()
+    value = new_generation()
+    cache.set_many({generation_key(descriptor): value,
+                    written_key(descriptor): value},
+                   timeout=generation_timeout)
+    keys = [key for _id in ids
+            for key in (item_key(descriptor, _id), batch_key(descriptor, _id))]
+    if keys:
+        cache.delete_many(*keys)
+
+
+def mark_stale(model: type, ids: Iterable=()):
+    """
+    Mark items of a model as written in the current transaction, for
+    writes which bypass the ORM unit of work such as bulk statements.
+    They are invalidated when the transaction commits.
+
+    Args:
+        model (type): Model class
+        ids (Iterable, optional): IDs of the written items. Defaults to ().
+    """
+    stale = db.session.info.setdefault("stale", {})
+    stale.setdefault(model, set()).update(ids)
+
+
+@event.listens_for(Session, "after_flush")
+def collect_stale(session: Session, flush_context: object):
+    """
+    Record the models and IDs of instances written by a flush
+    """
+    stale = session.info.setdefault("stale", {})
+    for instance in session.new | session.dirty | session.deleted:
+        model = type(instance)
+        if not hasattr(model, "descriptor"):
+            continue
+        ids = stale.setdefault(model, set())
+        if instance not in session.new:
+            ids.update(inspect(instance).identity or ())
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_stale(session: Session):
+    """
+    Invalidate everything recorded as written once the outermost
+    transaction is committed (savepoint releases also fire this event)
+    """
+    if session.transaction is not None and session.transaction.nested:
+        return
+    stale = session.info.pop("stale", {})
+    for model, ids in stale.items():
+        invalidate(model.descriptor(), ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def discard_stale(session: Session, previous_transaction: object):
+    """
+    Forget recorded writes when the outermost transaction is rolled back
+    """
+    if previous_transaction.parent is None:
+        session.info.pop("stale", None)
+
+
+def lock_key(key: str, variant: str=None) -> str:
+    """
+    Cache key of the recompute lock of a cached response
+
+    Args:
+        key (str): Cache key of the entry
+        variant (str, optional): Variant within the entry. Defaults to None.
+
+    Returns:
+        str: Cache key
+    """
+    return f"{key}:{variant}:lock" if variant else f"{key}:lock"
+
+
+def read_record(key: str, variant: str=None) -> dict:
+    """
+    Read a cached response record
+
+    Args:
+        key (str): Cache key of the entry
+        variant (str, optional): Variant within the entry, for entries
+                                 holding many variants. Defaults to None.
+
+    Returns:
+        dict: Record or None if not cached
+    """
+    entry = cache.get(key)
+    if entry is not None and variant is not None:
+        return entry.get(variant)
+    return entry
+
+
+def write_record(key: str, variant: str, record: dict):
+    """
+    Write a cached response record, keeping it past its expiry for the
+    stale window
+
+    Args:
+        key (str): Cache key of the entry
+        variant (str): Variant within the entry or None
+        record (dict): Record to write
+    """
+    config = current_app.config
+    timeout = config["CACHE_DEFAULT_TIMEOUT"] + config["CACHE_STALE_TIMEOUT"]
+    if variant is None:
+        cache.set(key, record, timeout=timeout)
+        return
+
+    entry = dict(cache.get(key) or {})
+    if len(entry) >= config["CACHE_ITEM_MAX_VARIANTS"]:
+        entry.clear()
+    entry[variant] = record
+    cache.set(key, entry, timeout=timeout)
+
+
+def read_batch(descriptor: ModelDescriptor,
+               ids: List[int]) -> Tuple[dict, List[int], int]:
+    """
+    Read the cached serialized items of many IDs with a single multi-get
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+        ids (List[int]): IDs of the items
+
+    Returns:
+        Tuple[dict, List[int], int]: Serialized items by ID, the IDs
+                                     which missed & the model's generation
+                                     before the lookup, for write_batch
+    """
+    since = generation(descriptor)
+    items = cache.get_many(*[batch_key(descriptor, _id) for _id in ids])
+    found, missed = {}, []
+    for _id, item in zip(ids, items):
+        if item is not None:
+            found[_id] = item
+        else:
+            missed.append(_id)
+    lookups.labels(view="batch", result="hit").inc(len(found))
+    lookups.labels(view="batch", result="miss").inc(len(missed))
+    return found, missed, since
+
+
+def write_batch(descriptor: ModelDescriptor, items: dict, since: int):
+    """
+    Backfill the cached serialized items of many IDs with a single
+    multi-set. Like compute_record() they are dropped again if the model
+    was written since the lookup, as they may have been loaded before
+    the write.
+
+    Args:
+        descriptor (ModelDescriptor): Descriptor of the model
+        items (dict): Serialized items by ID
+        since (int): Generation of the model returned by read_batch
+    """
+    if not items:
+        return
+    config = current_app.config
+    timeout = config["CACHE_DEFAULT_TIMEOUT"] + config["CACHE_STALE_TIMEOUT"]
+    mapping = {batch_key(descriptor, _id): item
+               for _id, item in items.items()}
+    cache.set_many(mapping, timeout=timeout)
+    if generation(descriptor) != since:
+        cache.delete_many(*mapping)
+
+
+def should_refresh(record: dict, now: float) -> bool:
+    """
+    Decide whether a cached response is expired or, randomly, should be
+    refreshed early
+
+    Args:
+        record (dict): Cached response record
+        now (float): Current time
+
+    Returns:
+        bool: True if it should be recomputed
+    """
+    beta = current_app.config["CACHE_EARLY_REFRESH_BETA"]
+    early = -record["delta"] * beta * math.log(1.0 - random.random())
+    return now + early >= record["expires"]
+
+
+def compute_record(key: str, variant: str, compute: Callable,
+                   descriptor: ModelDescriptor=None) -> Tuple[Response, int]:
+    """
+    Compute a response and cache it. Item entries, which aren't keyed by
+    generation, are dropped again if the model was written while the
+    response was computed since it may hold the item from before the write.
+
+    Args:
+        key (str): Cache key of the entry
+        variant (str): Variant within the entry or None
+        compute (Callable): Computes the response
+        descriptor (ModelDescriptor, optional): Descriptor of the model of
+                                                an item entry. Defaults to
+                                                None.
+
+    Returns:
+        Tuple[Response, int]: Flask Response & HTTP status code
+    """
+    since = generation(descriptor) if descriptor is not None else None
+    start = time.time()
+    resp, http_code = compute()
+    now = time.time()
+    body = resp.get_data()
+    record = {"body": body, "http_code": http_code,
+              "encoded": compress_all(body),
+              "etag": hashlib.blake2b(body, digest_size=16).hexdigest(),
+              "expires": now + current_app.config["CACHE_DEFAULT_TIMEOUT"],
+              "delta": now - start}
+    write_record(key, variant, record)
+    if since is not None and generation(descriptor) != since:
+        cache.delete(key)
+    return cached_response(record)
+
+
+def cached_response(record: dict) -> Tuple[Response, int]:
+    """
+    Rebuild a response from a cached response record in the best content
+    encoding accepted by the client, or a bodiless 304 Not Modified if
+    the request's If-None-Match matches its ETag
+
+    Args:
+        record (dict): Cached response record
+
+    Returns:
+        Tuple[Response, int]: Flask Response & HTTP status code
+    """
+    encoding = negotiate(list(record["encoded"]))
+    etag = record["etag"] if encoding is None else \
+           f"{record['etag']}-{encoding}"
+
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        http_code = 304
+    else:
+        body = record["body"] if encoding is None else \
+               record["encoded"][encoding]
+        mimetype = current_app.config["JSONIFY_MIMETYPE"]
+        response = Response(body, status=record["http_code"],
+                            mimetype=mimetype)
+        http_code = record["http_code"]
+        if encoding is not None:
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(etag)
+    if record["encoded"]:
+        response.vary.add("Accept-Encoding")
+    return (response, http_code)
+
+
+def serve(key: str, variant: str, view: str, compute: Callable,
+          descriptor: ModelDescriptor=None) -> Tuple[Response, int]:
+    """
+    Serve a cached response, recomputing it with stampede protection
+    when it is missing, stale, or picked for early refresh
+
+    Args:
+        key (str): Cache key of the entry
+        variant (str): Variant within the entry or None
+        view (str): Name of the view, used as metrics label
+        compute (Callable): Computes the response
+        descriptor (ModelDescriptor, optional): Descriptor of the model of
+                                                an item entry, see
+                                                compute_record(). Defaults
+                                                to None.
+
+    Returns:
+        Tuple[Response, int]: Flask Response & HTTP status code
+    """
+    config = current_app.config
+    record = read_record(key, variant)
+    now = time.time()
+    if record is not None and not should_refresh(record, now):
+        lookups.labels(view=view, result="hit").inc()
+        return cached_response(record)
+
+    lookups.labels(view=view,
+                   result="miss" if record is None else "stale").inc()
+    lock = lock_key(key, variant)
+    if cache.add(lock, 1, timeout=config["CACHE_LOCK_TIMEOUT"]):
+        try:
+            recomputes.labels(view=view).inc()
+            return compute_record(key, variant, compute, descriptor)
+        finally:
+            cache.delete(lock)
+
+    if record is not None:
+        if record["expires"] <= now:
+            stale_serves.labels(view=view).inc()
+        return cached_response(record)
+
+    lock_waits.labels(view=view).inc()
+    deadline = now + config["CACHE_LOCK_WAIT"]
+    while time.time() < deadline:
+        time.sleep(0.01)
+        record = read_record(key, variant)
+        if record is not None:
+            return cached_response(record)
+        if cache.get(lock) is None:
+            break
+
+    recomputes.labels(view=view).inc()
+    return compute_record(key, variant, compute, descriptor)
+
+
+def cached_item(view):
+    """
+    Decorator caching a view of a single item, taking (model, _id), in
+    the item's entry so all variants are evicted when the item is written.
+    """
+    @wraps(view)
+    def wrapper(model:str, _id:int) -> Tuple[Response, int]:
+        from app.models import descriptors
+        if model not in descriptors:
+            return view(model, _id)
+
+        descriptor = descriptors[model]
+        return serve(item_key(descriptor, _id), query_variant(),
+                     view.__name__, lambda: view(model, _id), descriptor)
+    return wrapper
+
+
+def cached_list(view):
+    """
+    Decorator caching a view of many items of a model, taking (model),
+    under the model's current generation. Batch gets by ?ids= are cached
+    per item by the view instead, see read_batch().
+    """
+    @wraps(view)
+    def wrapper(model:str) -> Tuple[Response, int]:
+        from app.models import descriptors
+        if model not in descriptors or "ids" in request.args:
+            return view(model)
+
+        return serve(list_key(descriptors[model]), None, view.__name__,
+                     lambda: view(model))
+    return wrapper
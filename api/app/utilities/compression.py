@@ -0,0 +1,116 @@
+"""
+Response compression negotiated via the Accept-Encoding request header
+
+gzip is always available, brotli ("br") when the brotli package is
+installed. Bodies smaller than COMPRESS_MIN_SIZE bytes are sent as is
+since compressing them costs more CPU than it saves on the wire.
+
+Cached responses are compressed once when they are cached (see
+app/utilities/caching.py) so cache hits are never recompressed, every
+other response is compressed on the fly by compress_response().
+"""
+
+import gzip
+from typing import Optional
+from flask import current_app, request, Response
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def available_encodings() -> list:
+    """
+    Get the configured content encodings usable in this environment, in
+    order of preference
+
+    Returns:
+        list: Content encoding names
+    """
+    configured = current_app.config["COMPRESS_ALGORITHMS"].split(",")
+    return [name for name in configured
+            if name == "gzip" or (name == "br" and brotli)]
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a body
+
+    Args:
+        body (bytes): Body to compress
+        encoding (str): "gzip" or "br"
+
+    Returns:
+        bytes: Compressed body
+    """
+    config = current_app.config
+    if encoding == "br":
+        return brotli.compress(body, quality=config["COMPRESS_BROTLI_QUALITY"])
+    return gzip.compress(body, compresslevel=config["COMPRESS_LEVEL"])
+
+
+def compress_all(body: bytes) -> dict:
+    """
+    Compress a body with every available encoding, used to store
+    precompressed cached responses
+
+    Args:
+        body (bytes): Body to compress
+
+    Returns:
+        dict: {encoding: compressed body}, empty if the body is too small
+    """
+    if len(body) < current_app.config["COMPRESS_MIN_SIZE"]:
+        return {}
+    return {encoding: compress(body, encoding)
+            for encoding in available_encodings()}
+
+
+def negotiate(encodings: list) -> Optional[str]:
+    """
+    Pick the content encoding for the current request
+
+    Args:
+        encodings (list): Encodings the response is available in, in
+                          order of preference
+
+    Returns:
+        Optional[str]: Best encoding accepted by the client or None
+    """
+    if not encodings:
+        return None
+    return request.accept_encodings.best_match(encodings)
+
+
+def compress_response(response: Response) -> Response:
+    """
+    Compress a response on the fly if the client accepts it and it is
+    large enough. Registered as an after_request handler.
+
+    Args:
+        response (Response): Response to compress
+
+    Returns:
+        Response: The same response, possibly compressed
+    """
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 304)
+            or "Content-Encoding" in response.headers):
+        return response
+
+    body = response.get_data()
+    if len(body) < current_app.config["COMPRESS_MIN_SIZE"]:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(available_encodings())
+    if encoding is None:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak=weak)
+    return response
@@ -0,0 +1,154 @@
+"""
+Count strategies for pagination totals
+
+An exact COUNT(*) of a large table can cost more than fetching the page
+itself, so the total of a read_all page is produced by one of these
+modes, picked with ?count=<mode> or PAGINATION_COUNT_MODE:
+    exact:    COUNT(*) on every request
+    cached:   COUNT(*) once per model generation and filter, reused by
+              every page until an item of the model is written
+    estimate: the row estimate of MySQL, TABLE_ROWS of
+              information_schema when unfiltered, the rows of EXPLAIN
+              when filtered. Falls back to cached on other databases.
+    none:     no total
+
+The pagination of every response includes the mode which produced its
+total as "count_mode".
+"""
+
+import hashlib
+from typing import Optional, Tuple
+from flask import current_app
+from flask_sqlalchemy import BaseQuery
+from werkzeug.exceptions import BadRequest
+from app.utilities.extensions.db import db
+from app.utilities.extensions.cache import cache
+from app.utilities.caching import generation
+from app.utilities.registry import ModelDescriptor
+
+count_modes = ("exact", "cached", "estimate", "none")
+true_values = ("1", "true", "yes", "on")
+false_values = ("0", "false", "no", "off")
+
+
+def parse_count_mode(args: dict, default: str) -> str:
+    """
+    Parse the count mode of a request. Besides a mode ?count= accepts a
+    boolean, true being PAGINATION_COUNT_MODE (exact if that is none)
+    and false being none.
+
+    Args:
+        args (dict): Request query params
+        default (str): Mode if the param is missing
+
+    Raises:
+        BadRequest: Unknown mode
+
+    Returns:
+        str: Count mode
+    """
+    value = args.get("count")
+    if value is None:
+        return default
+    value = value.lower()
+    if value in count_modes:
+        return value
+    if value in true_values:
+        configured = current_app.config["PAGINATION_COUNT_MODE"]
+        return configured if configured != "none" else "exact"
+    if value in false_values:
+        return "none"
+    raise BadRequest(f"Bad Request - count must be a boolean or one of "
+                     f"{list(count_modes)}.")
+
+
+def exact_count(query: BaseQuery) -> int:
+    """
+    Count the rows of a query
+
+    Args:
+        query (BaseQuery): Query to count
+
+    Returns:
+        int: Number of rows
+    """
+    return query.order_by(None).count()
+
+
+def cached_count(query: BaseQuery, descriptor: ModelDescriptor) -> int:
+    """
+    Count the rows of a query, cached under the model's generation so
+    any write to the model retires it
+
+    Args:
+        query (BaseQuery): Query to count
+        descriptor (ModelDescriptor): Descriptor of the model
+
+    Returns:
+        int: Number of rows
+    """
+    compiled = query.order_by(None).statement.compile()
+    variant = f"{compiled}{sorted(compiled.params.items())}"
+    digest = hashlib.md5(variant.encode("utf-8")).hexdigest()
+    key = f"{descriptor.table}:count:{generation(descriptor)}:{digest}"
+
+    total = cache.get(key)
+    if total is None:
+        total = exact_count(query)
+        cache.set(key, total,
+                  timeout=current_app.config["PAGINATION_COUNT_CACHE_TIMEOUT"])
+    return total
+
+
+def estimated_count(query: BaseQuery, table: str) -> Optional[int]:
+    """
+    Estimate the rows of a query from MySQL's statistics
+
+    Args:
+        query (BaseQuery): Query to estimate
+        table (str): Name of the queried table
+
+    Returns:
+        Optional[int]: Estimated number of rows, None if the database
+                       can't estimate it
+    """
+    connection = db.session.connection()
+    if connection.dialect.name != "mysql":
+        return None
+
+    statement = query.order_by(None).statement
+    if statement.whereclause is None:
+        row = connection.execute(
+            db.text("SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table"),
+            table=table).first()
+        return int(row[0]) if row and row[0] is not None else None
+
+    compiled = statement.compile(dialect=connection.dialect)
+    row = connection.execute(f"EXPLAIN {compiled}", compiled.params).first()
+    return int(row["rows"]) if row and row["rows"] is not None else None
+
+
+def count(query: BaseQuery, model: type, mode: str) -> Tuple[Optional[int],
+                                                              str]:
+    """
+    Count the rows of a query with a count mode
+
+    Args:
+        query (BaseQuery): Query to count
+        model (type): Model class of the query
+        mode (str): One of count_modes
+
+    Returns:
+        Tuple[Optional[int], str]: Total & the mode which produced it
+    """
+    if mode == "estimate":
+        total = estimated_count(query, model.descriptor().table)
+        if total is not None:
+            return total, mode
+        mode = "cached"
+    if mode == "cached":
+        return cached_count(query, model.descriptor()), mode
+    if mode == "exact":
+        return exact_count(query), mode
+    return None, "none"
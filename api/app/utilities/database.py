@@ -2,9 +2,14 @@
 Database helpers and Mixins
 """
 
-from sqlalchemy.inspection import inspect
+from typing import List, Tuple
+from sqlalchemy import bindparam
+from sqlalchemy.exc import IntegrityError
 from app.utilities.extensions.db import db
-from app.utilities.helpers import is_jsonable
+from app.utilities.caching import mark_stale
+from app.utilities.registry import describe, ModelDescriptor
+from app.utilities.serializers import Serializer
+from app.utilities.validation import ValidationError
 
 # Aliases
 Column = db.Column
@@ -37,6 +42,87 @@ def drop_db(db_uri: str):
         drop_database(db_uri)
 
 
+def dispose_engines(app: object):
+    """
+    Discard the pooled connections of every engine of the app without
+    closing them. Used in processes forked after the app connected, the
+    connections belong to the parent and must neither be shared nor
+    closed by a child.
+
+    Args:
+        app (Flask): App whose engines to reset
+    """
+    for connector in app.extensions["sqlalchemy"].connectors.values():
+        engine = connector.get_engine()
+        engine.pool = engine.pool.recreate()
+
+
+def execute_chunked(statement: object, rows: List[dict],
+                    chunk_size: int) -> List[bool]:
+    """
+    Execute a statement for many rows, one multi-row executemany per
+    chunk, each chunk inside its own savepoint. When a chunk violates a
+    constraint it is rolled back and retried row by row so that only the
+    offending rows are rejected. Nothing is committed here.
+
+    Args:
+        statement (object): SQLAlchemy core statement to execute
+        rows (List[dict]): Bind parameters, one dict per row. All dicts
+                           must have the same keys.
+        chunk_size (int): Number of rows to send per statement
+
+    Returns:
+        List[bool]: Per row, True if written, False if rejected
+    """
+    written = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        try:
+            with db.session.begin_nested():
+                db.session.execute(statement, chunk)
+            written += [True] * len(chunk)
+        except IntegrityError:
+            for row in chunk:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(statement, row)
+                    written.append(True)
+                except IntegrityError:
+                    written.append(False)
+    return written
+
+
+def group_by_keys(rows: List[dict]) -> dict:
+    """
+    Group rows by the set of keys they contain so each group can be sent
+    as a single executemany statement.
+
+    Args:
+        rows (List[dict]): Rows to group
+
+    Returns:
+        dict: {frozenset of keys: [(index, row), ...]}
+    """
+    groups = {}
+    for index, row in enumerate(rows):
+        groups.setdefault(frozenset(row), []).append((index, row))
+    return groups
+
+
+def invalid_items(index: int, error: ValidationError) -> List[dict]:
+    """
+    Tag the field errors of an item of a bulk write with its index
+
+    Args:
+        index (int): Index of the item
+        error (ValidationError): Errors of the item
+
+    Returns:
+        List[dict]: [{"index": index, "field": key, "error": message}, ...]
+    """
+    return [dict(index=index, **field_error) for field_error in error.errors]
+
+
 class CRUDMixin(object):
     """
     Mixin that adds methods for create, read, update, and
@@ -53,6 +139,250 @@ class CRUDMixin(object):
         return instance.save()
 
 
+    @classmethod
+    def prepare_values(cls, partial:bool=False, **kwargs) -> dict:
+        """
+        Validate keyword arguments with the model's validator and apply
+        any python side logic needed before they are written straight to
+        the table, bypassing the model constructor.
+
+        Args:
+            partial (bool, optional): Skip the required columns check,
+                                      used for updates. Defaults to False.
+
+        Raises:
+            ValidationError: Invalid fields
+
+        Returns:
+            dict: Column values ready to be written to the table
+        """
+        return cls.descriptor().validator(kwargs, partial=partial)
+
+
+    @classmethod
+    def prepare_many(cls, items: List[dict],
+                     partial: bool=False) -> Tuple[List[dict], List[dict]]:
+        """
+        Prepare the column values of many items with prepare_values(),
+        used by bulk writes. Models with expensive per item logic can
+        override it to batch that logic.
+
+        Args:
+            items (List[dict]): Keyword arguments of each item
+            partial (bool, optional): Skip the required columns check,
+                                      used for updates. Defaults to False.
+
+        Returns:
+            Tuple[List[dict], List[dict]]: Column values of each valid
+                                           item & errors of invalid items,
+                                           {"index", "field", "error"}
+                                           each, see invalid_items()
+        """
+        rows, invalid = [], []
+        for index, item in enumerate(items):
+            try:
+                if type(item) is not dict:
+                    # Rejects anything but a JSON object
+                    cls.descriptor().validator(item)
+                rows.append(cls.prepare_values(partial=partial, **item))
+            except ValidationError as error:
+                invalid += invalid_items(index, error)
+        return rows, invalid
+
+
+    @classmethod
+    def existing_ids(cls, ids: List[int]) -> set:
+        """
+        Get which of the passed IDs exist in the table using a single
+        `WHERE id IN (...)` query.
+
+        Args:
+            ids (List[int]): IDs to look for
+
+        Returns:
+            set: IDs which exist
+        """
+        pk = cls.descriptor().pk.column
+        rows = db.session.query(pk).filter(pk.in_(ids)).all()
+        return {row[0] for row in rows}
+
+
+    @classmethod
+    def bulk_create(cls, rows: List[dict], chunk_size: int) -> List[bool]:
+        """
+        Insert many records using chunked multi-row INSERT statements.
+        Rows must already be validated with prepare_many().
+
+        Args:
+            rows (List[dict]): Column values of each record to insert
+            chunk_size (int): Number of rows per INSERT statement
+
+        Returns:
+            List[bool]: Per row, True if created, False if it conflicted
+        """
+        created = [False] * len(rows)
+        for group in group_by_keys(rows).values():
+            indexes, values = zip(*group)
+            statement = cls.__table__.insert()
+            written = execute_chunked(statement, list(values), chunk_size)
+            for index, ok in zip(indexes, written):
+                created[index] = ok
+        mark_stale(cls)
+        return created
+
+
+    @classmethod
+    def bulk_update(cls, rows: List[dict], chunk_size: int) -> List[int]:
+        """
+        Update many records by ID using chunked multi-row UPDATE
+        statements. Rows must already be validated with prepare_many()
+        and each must contain the record's ID. Rows with nothing but the
+        ID aren't written, they only report whether the record exists.
+
+        Args:
+            rows (List[dict]): Column values of each record to update
+            chunk_size (int): Number of rows per UPDATE statement
+
+        Returns:
+            List[int]: Per row HTTP status, 200 updated, 404 not found,
+                       or 409 conflict
+        """
+        pk = cls.descriptor().pk.column
+        statuses = [404] * len(rows)
+        found = set()
+        for start in range(0, len(rows), chunk_size):
+            chunk = rows[start:start + chunk_size]
+            found |= cls.existing_ids([row[pk.key] for row in chunk])
+
+        params = []
+        for index, row in enumerate(rows):
+            param = {k: v for k, v in row.items() if k != pk.key}
+            if row[pk.key] not in found:
+                param = None
+            elif not param:
+                statuses[index] = 200
+                param = None
+            else:
+                param["_id"] = row[pk.key]
+            params.append(param)
+
+        existing = [(i, p) for i, p in enumerate(params) if p is not None]
+        for group in group_by_keys([p for _, p in existing]).values():
+            positions, values = zip(*group)
+            statement = cls.__table__.update().where(pk == bindparam("_id"))
+            written = execute_chunked(statement, list(values), chunk_size)
+            for position, ok in zip(positions, written):
+                statuses[existing[position][0]] = 200 if ok else 409
+        mark_stale(cls, found)
+        return statuses
+
+
+    @classmethod
+    def bulk_delete(cls, ids: List[int], chunk_size: int) -> List[int]:
+        """
+        Delete many records by ID using chunked
+        `DELETE ... WHERE id IN (...)` statements.
+
+        Args:
+            ids (List[int]): IDs of the records to delete
+            chunk_size (int): Number of IDs per DELETE statement
+
+        Returns:
+            List[int]: Per ID HTTP status, 200 deleted, 404 not found,
+                       or 409 conflict. Repeats of an ID are 404, it was
+                       already deleted by its first occurrence.
+        """
+        pk = cls.descriptor().pk.column
+        unique = list(dict.fromkeys(ids))
+        statuses = {}
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start:start + chunk_size]
+            found = cls.existing_ids(chunk)
+            if not found:
+                continue
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(
+                        cls.__table__.delete().where(pk.in_(found)))
+                statuses.update({_id: 200 for _id in found})
+            except IntegrityError:
+                for _id in found:
+                    try:
+                        with db.session.begin_nested():
+                            db.session.execute(
+                                cls.__table__.delete().where(pk == _id))
+                        statuses[_id] = 200
+                    except IntegrityError:
+                        statuses[_id] = 409
+        mark_stale(cls, statuses)
+        results = []
+        for _id in ids:
+            results.append(statuses.pop(_id, 404))
+        return results
+
+
+    @classmethod
+    def update_by_id(cls, _id: int, commit: bool=True, **kwargs) -> bool:
+        """
+        Update a record by ID with a single `UPDATE ... WHERE id=:id`,
+        without loading it. Values go through prepare_values() so python
+        side logic such as password hashing still applies, but ORM events
+        and validators don't run.
+
+        Args:
+            _id (int): ID of the record to update
+            commit (bool, optional): Commit or not. Defaults to True.
+
+        Raises:
+            ValidationError: Invalid fields or the primary key is in kwargs
+
+        Returns:
+            bool: True if the record exists, False otherwise
+        """
+        pk = cls.descriptor().pk.column
+        if pk.key in kwargs:
+            raise ValidationError([{"field": pk.key,
+                                    "error": "can not be updated"}])
+        values = cls.prepare_values(partial=True, **kwargs)
+        if not values:
+            return _id in cls.existing_ids([_id])
+
+        # MySQL counts matched rows rather than changed rows since
+        # SQLAlchemy connects with the FOUND_ROWS client flag
+        result = db.session.execute(
+            cls.__table__.update().where(pk == _id).values(**values))
+        if not result.rowcount:
+            return False
+        mark_stale(cls, [_id])
+        if commit:
+            db.session.commit()
+        return True
+
+
+    @classmethod
+    def delete_by_id(cls, _id: int, commit: bool=True) -> bool:
+        """
+        Delete a record by ID with a single `DELETE ... WHERE id=:id`,
+        without loading it. ORM events and relationship cascades don't
+        run, database foreign keys still apply.
+
+        Args:
+            _id (int): ID of the record to delete
+            commit (bool, optional): Commit or not. Defaults to True.
+
+        Returns:
+            bool: True if the record existed, False otherwise
+        """
+        pk = cls.descriptor().pk.column
+        result = db.session.execute(cls.__table__.delete().where(pk == _id))
+        if not result.rowcount:
+            return False
+        mark_stale(cls, [_id])
+        if commit:
+            db.session.commit()
+        return True
+
+
     def save(self, commit:bool=True) -> object:
         """
         Save record to database
@@ -69,6 +399,33 @@ class CRUDMixin(object):
         return self
 
 
+    @classmethod
+    def descriptor(cls) -> ModelDescriptor:
+        """
+        Get the model's descriptor, building it on first use. Models
+        listed in app/models/__init__.py are built when registered.
+
+        Returns:
+            ModelDescriptor: Column metadata of this model
+        """
+        descriptor = cls.__dict__.get("_descriptor")
+        if descriptor is None:
+            descriptor = describe(cls)
+            cls._descriptor = descriptor
+        return descriptor
+
+
+    @classmethod
+    def serializer(cls) -> Serializer:
+        """
+        Get the model's serializer, built with its descriptor
+
+        Returns:
+            Serializer: Serializer for this model
+        """
+        return cls.descriptor().serializer
+
+
     @property
     def as_dict(self) -> dict:
         """
@@ -77,12 +434,7 @@ class CRUDMixin(object):
         Returns:
             dict: This instance as a dict instead of a class object
         """
-        obj = {}
-        for c in inspect(self).mapper.column_attrs:
-            val = getattr(self, c.key)
-            if is_jsonable(val):
-                obj.update({c.key: val})
-        return obj
+        return self.serializer()(self)
 
 
     def update(self, commit:bool=True, **kwargs) -> bool:
@@ -0,0 +1,99 @@
+"""
+JSON encoder backends - the Responder encodes every response body through
+one of these. orjson is used when it is installed, otherwise the standard
+library json module.
+
+Select a backend with the JSON_BACKEND config value: "auto", "orjson",
+or "stdlib".
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class StdlibEncoder(object):
+    """
+    Encoder using the standard library json module
+    """
+
+    name = "stdlib"
+
+
+    def dumps(self, obj: object, pretty: bool=False) -> bytes:
+        """
+        Encode an object as JSON
+
+        Args:
+            obj (object): JSON serializable object
+            pretty (bool, optional): Indent output. Defaults to False.
+
+        Returns:
+            bytes: UTF-8 encoded JSON
+        """
+        if pretty:
+            return json.dumps(obj, indent=2).encode("utf-8")
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+class OrjsonEncoder(object):
+    """
+    Encoder using orjson, which encodes straight to bytes
+    """
+
+    name = "orjson"
+
+
+    def dumps(self, obj: object, pretty: bool=False) -> bytes:
+        """
+        Encode an object as JSON
+
+        Args:
+            obj (object): JSON serializable object
+            pretty (bool, optional): Indent output. Defaults to False.
+
+        Returns:
+            bytes: UTF-8 encoded JSON
+        """
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+
+
+backends = {
+    "stdlib": StdlibEncoder,
+    "orjson": OrjsonEncoder,
+}
+
+
+def available_backends() -> list:
+    """
+    Get the names of backends that can be used in this environment
+
+    Returns:
+        list: Names of usable backends
+    """
+    return [name for name in backends if name != "orjson" or orjson]
+
+
+def get_encoder(name: str="auto") -> object:
+    """
+    Get an encoder instance by backend name
+
+    Args:
+        name (str, optional): "auto", "orjson", or "stdlib".
+                              "auto" picks orjson when it is installed.
+                              Defaults to "auto".
+
+    Raises:
+        ValueError: Unknown or unavailable backend
+
+    Returns:
+        object: Encoder instance
+    """
+    if name == "auto":
+        name = "orjson" if orjson else "stdlib"
+    if name not in available_backends():
+        raise ValueError(f"JSON backend {name} is not available")
+    return backends[name]()
@@ -14,10 +14,11 @@ from app.utilities.exceptions.exception_handlers import *
 error_handlers = {
     redis_exceptions.ConnectionError: redis_conn_handler,
     sqlalchemy_exceptions.OperationalError: sqlalchemy_conn_handler,
+    ValidationError: validation_handler,
      Exception: generic_exception_handler
 }
 
 # Add all HTTP exceptions handled by the generic_handler to the error handlers
 # dict so they wil be registered
-status_codes = [400, 404, 405, 409, 500, 501]
+status_codes = [400, 404, 405, 409, 413, 500, 501, 503]
 [error_handlers.update({err: generic_http_handler}) for err in status_codes]
@@ -13,6 +13,7 @@ from flask import Response
 from sqlalchemy.exc import OperationalError
 from redis.exceptions import ConnectionError
 from app.utilities.responder import Responder
+from app.utilities.validation import ValidationError
 
 
 def generic_exception_handler(exc: Exception) -> Tuple[Response, int]:
@@ -65,3 +66,18 @@ def generic_http_handler(http_exc: Exception) -> Tuple[Response, int]:
         Tuple[Response, int]: Flask Response & HTTP status code
     """
     return Responder().fail(msg=http_exc.description, http_code=http_exc.code)
+
+
+def validation_handler(exc: ValidationError) -> Tuple[Response, int]:
+    """
+    A handler for invalid request bodies, listing the error of each field
+
+    Args:
+        exc (ValidationError): Validation error
+
+    Returns:
+        Tuple[Response, int]: Flask Response & HTTP status code
+    """
+    responder = Responder()
+    responder.errors = exc.errors
+    return responder.fail(msg=exc.description, http_code=exc.code)
@@ -0,0 +1,74 @@
+"""
+Streaming exporters which turn an iterable of rows into chunks of an
+NDJSON or CSV document, so a whole table can be sent without ever being
+held in memory.
+"""
+
+import io
+import csv
+from typing import Iterable, Iterator
+from app.utilities.serializers import Serializer
+
+# Bytes buffered before a chunk is yielded to the client. The first row
+# is yielded on its own right away, so the client starts receiving the
+# document without waiting for a full chunk
+chunk_size = 64 * 1024
+
+
+def ndjson_chunks(rows: Iterable, serializer: Serializer,
+                  encoder: object) -> Iterator[bytes]:
+    """
+    Stream rows as newline delimited JSON, one object per line
+
+    Args:
+        rows (Iterable): Model instances or rows
+        serializer (Serializer): Serializer of the rows
+        encoder (object): JSON encoder backend
+
+    Yields:
+        Iterator[bytes]: Chunks of the document
+    """
+    buffer = bytearray()
+    first = True
+    for row in rows:
+        buffer += encoder.dumps(serializer(row))
+        buffer += b"\n"
+        if first or len(buffer) >= chunk_size:
+            yield bytes(buffer)
+            buffer.clear()
+            first = False
+    if buffer:
+        yield bytes(buffer)
+
+
+def csv_chunks(rows: Iterable, serializer: Serializer) -> Iterator[bytes]:
+    """
+    Stream rows as CSV with a header line, sent with the first row
+
+    Args:
+        rows (Iterable): Model instances or rows
+        serializer (Serializer): Serializer of the rows
+
+    Yields:
+        Iterator[bytes]: Chunks of the document
+    """
+    buffer = io.StringIO()
+    keys = [key for key, _ in serializer.fields]
+    writer = csv.DictWriter(buffer, fieldnames=keys)
+    writer.writeheader()
+    first = True
+    for row in rows:
+        writer.writerow(serializer(row))
+        if first or buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+            first = False
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+export_formats = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
@@ -1,10 +0,0 @@
-"""
-Flask bcrypt Extension
-https://flask-bcrypt.readthedocs.io/en/latest/
-
-This must be registered to the app within app/factory.py
-"""
-
-from flask_bcrypt import Bcrypt
-
-bcrypt = Bcrypt()
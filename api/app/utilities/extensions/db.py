@@ -7,8 +7,24 @@ This must be registered to the app within app/factory.py
 Note: flask_sqlalchemy will remove the session at the end of
 the request context. This means we don't need to worry about starting
 and stopping database sessions on our own.
+
+Queries of read only views are routed to read replicas when configured,
+see app/utilities/replicas.py
 """
 
+from sqlalchemy import orm
 from flask_sqlalchemy import SQLAlchemy
+from app.utilities.replicas import RoutingSession
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """
+    SQLAlchemy extension whose sessions route reads to replicas
+    """
+
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
 
-db = SQLAlchemy()
+db = RoutingSQLAlchemy()
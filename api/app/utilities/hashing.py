@@ -0,0 +1,210 @@
+"""
+Password hashing off the request thread
+
+bcrypt is deliberately slow, BCRYPT_LOG_ROUNDS=12 costs roughly 250ms of
+CPU per hash or check. Hashes are computed in a pool of
+BCRYPT_POOL_WORKERS per app process, so hashing can never use more CPU
+than the pool has and the rest of the traffic keeps running.
+
+The pool bounds concurrency, it does not free the worker. The request
+still waits for its hash, so with SERVING_MODE=sync the worker is held
+for the full bcrypt time as before, only the number of hashes running at
+once is limited. With SERVING_MODE=gevent the waiting greenlet yields and
+the worker serves other requests meanwhile.
+
+SERVING_MODE=sync hashes in a pool of processes. A ProcessPoolExecutor
+relies on real threads and pipes, which don't mix with a gevent monkey
+patched worker, so SERVING_MODE=gevent hashes in gevent's pool of native
+threads instead. bcrypt releases the GIL while hashing, so the threads
+run in parallel with each other and with the event loop.
+
+Backpressure - at most BCRYPT_POOL_MAX_PENDING hashes (running or
+queued) are in flight per app process. A request which can't get a slot
+within BCRYPT_POOL_WAIT seconds fails with 503 Service Unavailable rather
+than queueing without bound.
+
+BCRYPT_POOL_WORKERS=0 hashes in the request thread, e.g. for development.
+"""
+
+import os
+import time
+import threading
+from typing import List
+import bcrypt
+from concurrent.futures import Future, ProcessPoolExecutor
+from flask import current_app
+from werkzeug.exceptions import ServiceUnavailable
+from app.utilities.metrics import Counter, Histogram
+
+hash_buckets = (.001, .005, .01, .025, .05, .1, .25, .5, 1.0, 2.5, 5.0, 10.0)
+
+hash_seconds = Histogram("password_hash_seconds",
+                         "Seconds to hash or check a password, including "
+                         "waiting for the pool", ("operation",),
+                         buckets=hash_buckets)
+slot_wait_seconds = Histogram("password_hash_slot_wait_seconds",
+                              "Seconds waited for a free hashing slot",
+                              buckets=hash_buckets)
+rejections = Counter("password_hash_rejections_total",
+                     "Hashes rejected because the pool was busy")
+
+_pool = None
+_slots = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def hash_password(password: bytes, rounds: int) -> bytes:
+    """
+    Hash a password, run in the pool
+
+    Args:
+        password (bytes): Password
+        rounds (int): bcrypt log rounds
+
+    Returns:
+        bytes: Hash
+    """
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def check_password(pw_hash: bytes, password: bytes) -> bool:
+    """
+    Check a password against a hash, run in the pool
+
+    Args:
+        pw_hash (bytes): Hash
+        password (bytes): Password
+
+    Returns:
+        bool: True if the password matches
+    """
+    return bcrypt.checkpw(password, pw_hash)
+
+
+def pool() -> tuple:
+    """
+    Get the pool and slots of this process, created lazily so every
+    forked gunicorn worker gets its own, after the gevent worker has
+    monkey patched it
+
+    Returns:
+        tuple: (Executor, BoundedSemaphore)
+    """
+    global _pool, _slots, _pool_pid
+    if _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool_pid != os.getpid():
+                config = current_app.config
+                workers = config["BCRYPT_POOL_WORKERS"]
+                if config["SERVING_MODE"] == "gevent":
+                    from gevent.threadpool import ThreadPoolExecutor
+                    _pool = ThreadPoolExecutor(workers)
+                else:
+                    _pool = ProcessPoolExecutor(workers)
+                _slots = threading.BoundedSemaphore(
+                    config["BCRYPT_POOL_MAX_PENDING"])
+                _pool_pid = os.getpid()
+    return _pool, _slots
+
+
+def submit(operation: str, func: object, *args) -> Future:
+    """
+    Run a hashing function in the pool once a slot is free
+
+    Args:
+        operation (str): "hash" or "check", used as metrics label
+        func (Callable): hash_password or check_password
+        *args: Arguments of func
+
+    Raises:
+        ServiceUnavailable: No slot became free within BCRYPT_POOL_WAIT
+
+    Returns:
+        Future: Result of func
+    """
+    executor, slots = pool()
+    start = time.perf_counter()
+    if not slots.acquire(timeout=current_app.config["BCRYPT_POOL_WAIT"]):
+        rejections.inc()
+        raise ServiceUnavailable("Too many passwords are being hashed, "
+                                 "retry later")
+    slot_wait_seconds.observe(time.perf_counter() - start)
+
+    def done(future):
+        slots.release()
+        hash_seconds.labels(operation=operation) \
+                    .observe(time.perf_counter() - start)
+
+    future = executor.submit(func, *args)
+    future.add_done_callback(done)
+    return future
+
+
+def run(operation: str, func: object, *args) -> object:
+    """
+    Run a hashing function in the pool, or inline if it is disabled, and
+    wait for its result
+
+    Args:
+        operation (str): "hash" or "check", used as metrics label
+        func (Callable): hash_password or check_password
+        *args: Arguments of func
+
+    Returns:
+        object: Result of func
+    """
+    if current_app.config["BCRYPT_POOL_WORKERS"] <= 0:
+        start = time.perf_counter()
+        result = func(*args)
+        hash_seconds.labels(operation=operation) \
+                    .observe(time.perf_counter() - start)
+        return result
+    return submit(operation, func, *args).result()
+
+
+def generate_password_hash(password: str) -> bytes:
+    """
+    Hash a password with BCRYPT_LOG_ROUNDS
+
+    Args:
+        password (str): Password
+
+    Returns:
+        bytes: Hash
+    """
+    rounds = current_app.config["BCRYPT_LOG_ROUNDS"]
+    return run("hash", hash_password, password.encode("utf-8"), rounds)
+
+
+def generate_password_hashes(passwords: List[str]) -> List[bytes]:
+    """
+    Hash many passwords concurrently, e.g. for bulk creates
+
+    Args:
+        passwords (List[str]): Passwords
+
+    Returns:
+        List[bytes]: Hashes, in order
+    """
+    rounds = current_app.config["BCRYPT_LOG_ROUNDS"]
+    if current_app.config["BCRYPT_POOL_WORKERS"] <= 0:
+        return [run("hash", hash_password, password.encode("utf-8"), rounds)
+                for password in passwords]
+    futures = [submit("hash", hash_password, password.encode("utf-8"), rounds)
+               for password in passwords]
+    return [future.result() for future in futures]
+
+
+def check_password_hash(pw_hash: bytes, password: str) -> bool:
+    """
+    Check a password against a hash
+
+    Args:
+        pw_hash (bytes): Hash
+        password (str): Password
+
+    Returns:
+        bool: True if the password matches
+    """
+    return run("check", check_password, pw_hash, password.encode("utf-8"))
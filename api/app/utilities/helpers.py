@@ -3,9 +3,6 @@ A collection of helper utilities
 """
 
 import json
-import flask_sqlalchemy
-from flask import request
-from flask_sqlalchemy import Pagination
 from werkzeug.exceptions import BadRequest
 
 
@@ -29,52 +26,24 @@ def load_json(data:object) -> dict:
         raise BadRequest("Bad Request - Missing/invalid POST data/headers.")
 
 
-def pagination_dict(pgn: Pagination, mask:list=[]) -> dict:
+def load_json_list(data:object, max_items:int) -> list:
     """
-    For some reason flask_sqlalchemy.Pagination does not have a 
-    serialization method so this is a patch to get all the properties we
-    want from a Pagination object.
-    https://flask-sqlalchemy.palletsprojects.com/en/2.x/api/#flask_sqlalchemy.Pagination
+    Load a non-empty JSON array from data object, used by bulk endpoints.
 
     Args:
-        pgn (flask_sqlalchemy.Pagination): Flask SQLAlchemy Pagination Object
-        mask (list, optional): Defaults to [] - Mask the keys of 
-                               properties to exclude from output dict
-                               available keys are:
-                                    has_next (bool): has next page
-                                    next_num (int): next page
-                                    has_prev (bool): has previous page
-                                    prev_num (int): previous page
-                                    page (int): current page
-                                    pages (int): total page count
-                                    per_page (int): results per page
-                                    total (int): total result count
-
-    Returns:
-        dict: Pagination information dictionary
-    """
-    p = {}
-    src = {"has_next": pgn.has_next, "next_num": pgn.next_num,
-           "has_prev": pgn.has_prev, "prev_num": pgn.prev_num,
-           "page": pgn.page, "pages": pgn.pages, "per_page": pgn.per_page,
-           "total": pgn.total,}
-
-    [p.update({k:v}) for k, v in src.items() if k not in mask]
-    return p
-
-
-def is_jsonable(obj: object) -> bool:
-    """
-    Check if an object can be converted to JSON
+        data (object): String or Bytes object of data
+        max_items (int): Maximum number of items allowed in the array
 
-    Args:
-        obj (object): Object to check
+    Raises:
+        BadRequest: Data is not a non-empty JSON array or is too large
 
     Returns:
-        bool: True if object can be converted to JSON, False otherwise
+        list: JSON loaded data
     """
-    try:
-        json.dumps(obj)
-        return True
-    except Exception:
-        return False
+    items = load_json(data)
+    if not isinstance(items, list) or not items:
+        raise BadRequest("Bad Request - Expected a non-empty JSON array.")
+    if len(items) > max_items:
+        raise BadRequest(f"Bad Request - Too many items, max is {max_items}.")
+    return items
+
@@ -0,0 +1,101 @@
+"""
+Request instrumentation, registered by app/factory.py
+
+    http_request_duration_seconds  Latency by endpoint, method, and model
+    http_requests_total            Responses by endpoint, method, and status
+    http_request_db_queries        Database queries per request by endpoint
+    http_request_db_seconds        Database time per request by endpoint
+
+The database is measured with cursor execution events of every engine,
+queries outside of a request (e.g. create_all) are not counted. Streamed
+responses are measured until their headers are sent.
+"""
+
+import time
+from flask import g, has_request_context, request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.utilities.metrics import Counter, Histogram
+
+request_seconds = Histogram("http_request_duration_seconds",
+                            "Seconds to handle a request",
+                            ("endpoint", "method", "model"))
+responses = Counter("http_requests_total", "Responses sent",
+                    ("endpoint", "method", "status"))
+db_queries = Histogram("http_request_db_queries",
+                       "Database queries executed per request",
+                       ("endpoint",),
+                       buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100, 250))
+db_seconds = Histogram("http_request_db_seconds",
+                       "Seconds spent executing database queries per "
+                       "request", ("endpoint",))
+
+
+def model_label() -> str:
+    """
+    Get the model of the current request as a label, empty for unknown
+    models so the number of label values stays bounded
+
+    Returns:
+        str: Name of the model
+    """
+    from app.models import models
+    model = (request.view_args or {}).get("model")
+    return model if model in models else ""
+
+
+def start_request():
+    """
+    Start measuring the current request. Registered as a before_request
+    handler.
+    """
+    g.request_start = time.perf_counter()
+    g.db_queries = 0
+    g.db_seconds = 0.0
+
+
+def record_request(response: Response) -> Response:
+    """
+    Record the measurements of the current request. Registered as an
+    after_request handler.
+
+    Args:
+        response (Response): Response of the request
+
+    Returns:
+        Response: The same response
+    """
+    if "request_start" not in g:
+        return response
+    endpoint = request.endpoint or "unmatched"
+    request_seconds.labels(endpoint=endpoint, method=request.method,
+                           model=model_label()) \
+                   .observe(time.perf_counter() - g.request_start)
+    responses.labels(endpoint=endpoint, method=request.method,
+                     status=response.status_code).inc()
+    db_queries.labels(endpoint=endpoint).observe(g.db_queries)
+    db_seconds.labels(endpoint=endpoint).observe(g.db_seconds)
+    return response
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def record_query(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info["query_start"].pop()
+    if has_request_context() and "db_queries" in g:
+        g.db_queries += 1
+        g.db_seconds += seconds
+        profile = g.get("profile")
+        if profile is not None:
+            profile.query(statement, seconds, cursor.rowcount)
+
+
+@event.listens_for(Engine, "handle_error")
+def discard_query(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_start"):
+        connection.info["query_start"].pop()
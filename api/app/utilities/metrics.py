@@ -0,0 +1,59 @@
+"""
+Prometheus metrics
+
+Metrics are defined with prometheus_client next to the code they
+measure and exposed in the Prometheus text format at /metrics.
+
+Gunicorn workers are separate processes, so when PROMETHEUS_MULTIPROC_DIR
+is set (gunicorn_conf.py sets it) every worker writes its values to files
+in that directory and /metrics aggregates the values of all workers, no
+matter which worker serves the scrape. It must be set before the first
+metric is created.
+
+https://github.com/prometheus/client_python#multiprocess-mode-eg-gunicorn
+"""
+
+import os
+from prometheus_client import (generate_latest, multiprocess,
+                               CollectorRegistry, Counter, Gauge, Histogram,
+                               CONTENT_TYPE_LATEST, REGISTRY)
+
+__all__ = ["Counter", "Gauge", "Histogram", "CONTENT_TYPE_LATEST",
+           "multiprocess_dir", "registry", "exposition"]
+
+
+def multiprocess_dir() -> str:
+    """
+    Get the directory metrics of all workers are aggregated in
+
+    Returns:
+        str: Directory or None when not in multiprocess mode
+    """
+    return os.getenv("PROMETHEUS_MULTIPROC_DIR") \
+           or os.getenv("prometheus_multiproc_dir")
+
+
+def registry() -> CollectorRegistry:
+    """
+    Get the registry to collect metrics from, aggregating every worker's
+    values in multiprocess mode
+
+    Returns:
+        CollectorRegistry: Registry
+    """
+    if multiprocess_dir() is None:
+        return REGISTRY
+    aggregated = CollectorRegistry()
+    multiprocess.MultiProcessCollector(aggregated)
+    return aggregated
+
+
+def exposition() -> bytes:
+    """
+    Render every metric in the Prometheus text format
+
+    Returns:
+        bytes: Text exposition
+    """
+    return generate_latest(registry())
+
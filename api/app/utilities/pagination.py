@@ -0,0 +1,217 @@
+"""
+Pagination helpers for generic queries.
+
+Two modes are supported:
+    page:   ?page=N&per_page=N - OFFSET/LIMIT, reports totals by default
+    cursor: ?after=<cursor>&limit=N - seeks past the sort values of the
+            last row of the previous page (the primary key by default)
+            so every page costs the same no matter how deep it is, and
+            skips the total count unless ?count=<mode> is passed
+
+Totals are produced by the count modes of app/utilities/counting.py.
+"""
+
+import json
+import math
+import base64
+import binascii
+from typing import List, Tuple
+from flask import current_app
+from flask_sqlalchemy import BaseQuery
+from werkzeug.exceptions import BadRequest
+from app.utilities.counting import count, parse_count_mode
+from app.utilities.registry import ColumnDescriptor
+from app.utilities.queries import apply_sort, seek_condition, to_python
+
+
+def encode_cursor(values: list) -> str:
+    """
+    Encode the sort values of the last row of a page as an opaque cursor
+
+    Args:
+        values (list): JSON serializable sort values
+
+    Returns:
+        str: URL safe cursor
+    """
+    raw = json.dumps(values, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decode a cursor created by encode_cursor()
+
+    Args:
+        cursor (str): Cursor from a previous page
+
+    Raises:
+        BadRequest: Cursor is malformed
+
+    Returns:
+        list: Sort values of the last row of the previous page
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, ValueError):
+        raise BadRequest("Bad Request - Invalid cursor.")
+    if not isinstance(values, list):
+        raise BadRequest("Bad Request - Invalid cursor.")
+    return values
+
+
+def parse_int(args: dict, key: str, default: int, lower: int=1,
+              upper: int=None) -> int:
+    """
+    Parse a bounded integer query parameter
+
+    Args:
+        args (dict): Request query params
+        key (str): Name of the param
+        default (int): Value if the param is missing
+        lower (int, optional): Minimum value. Defaults to 1.
+        upper (int, optional): Maximum value. Defaults to None.
+
+    Raises:
+        BadRequest: Param is not an integer or is out of bounds
+
+    Returns:
+        int: Parsed value
+    """
+    try:
+        value = int(args.get(key, default))
+    except (TypeError, ValueError):
+        raise BadRequest(f"Bad Request - {key} must be an integer.")
+    if value < lower:
+        raise BadRequest(f"Bad Request - {key} must be at least {lower}.")
+    if upper is not None and value > upper:
+        raise BadRequest(f"Bad Request - {key} must be at most {upper}.")
+    return value
+
+
+def is_cursor_request(args: dict) -> bool:
+    """
+    Check if the request asks for cursor pagination
+
+    Args:
+        args (dict): Request query params
+
+    Returns:
+        bool: True if the after or limit params are present
+    """
+    return "after" in args or "limit" in args
+
+
+def page_paginate(query: BaseQuery, model: type,
+                  args: dict) -> Tuple[List, dict]:
+    """
+    Paginate a query using OFFSET/LIMIT via ?page=N&per_page=N. The total
+    is produced by the ?count= mode, PAGINATION_COUNT_MODE by default.
+    With count=none total and pages are None.
+
+    Args:
+        query (BaseQuery): Query to paginate
+        model (type): Model class of the query
+        args (dict): Request query params
+
+    Raises:
+        BadRequest: Invalid page, per_page, or count
+
+    Returns:
+        Tuple[List, dict]: Page items & pagination dict
+    """
+    config = current_app.config
+    page = parse_int(args, "page", 1)
+    per_page = parse_int(args, "per_page", 20,
+                         upper=config["PAGINATION_MAX_LIMIT"])
+    mode = parse_count_mode(args, config["PAGINATION_COUNT_MODE"])
+
+    items = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    if mode != "none" and page == 1 and not has_next:
+        total, mode = len(items), "exact"
+    else:
+        total, mode = count(query, model, mode)
+
+    pagination = {"has_next": has_next, "next_num": page + 1 if has_next
+                  else None, "has_prev": page > 1, "prev_num": page - 1
+                  if page > 1 else None, "page": page,
+                  "pages": None if total is None else
+                  int(math.ceil(total / per_page)),
+                  "per_page": per_page, "total": total, "count_mode": mode}
+    return items, pagination
+
+
+def cursor_values(item: object, columns: List[ColumnDescriptor]) -> list:
+    """
+    Get the JSON ready sort values of a row to encode as a cursor
+
+    Args:
+        item (object): Model instance or row
+        columns (List[ColumnDescriptor]): Columns the rows are sorted by
+
+    Returns:
+        list: Sort values of the row
+    """
+    values = []
+    for column in columns:
+        value = getattr(item, column.key)
+        convert = column.converter
+        values.append(convert(value) if convert and value is not None
+                      else value)
+    return values
+
+
+def cursor_paginate(query: BaseQuery, model: type,
+                    sort: List[Tuple[object, bool]],
+                    args: dict) -> Tuple[List, dict]:
+    """
+    Paginate a query by seeking past the sort values of the last row of
+    the previous page via ?after=<cursor>&limit=N. The total is only
+    counted when a ?count= mode is passed.
+
+    Args:
+        query (BaseQuery): Query to paginate, without ordering
+        model (type): Model class of the query
+        sort (List[Tuple[object, bool]]): Sort ending with a unique column
+        args (dict): Request query params
+
+    Raises:
+        BadRequest: Sorting on a nullable column
+        BadRequest: Invalid cursor, limit, or count
+
+    Returns:
+        Tuple[List, dict]: Page items & pagination dict
+    """
+    columns = [model.descriptor().columns[c.key] for c, _ in sort]
+    nullable = [column.key for column in columns if column.nullable]
+    if nullable:
+        raise BadRequest(f"Bad Request - Can not use cursors when sorting "
+                         f"on nullable columns {nullable}.")
+
+    limit = parse_int(args, "limit", 20,
+                      upper=current_app.config["PAGINATION_MAX_LIMIT"])
+    total, mode = count(query, model, parse_count_mode(args, "none"))
+
+    page_query = apply_sort(query, sort)
+    if args.get("after"):
+        after = decode_cursor(args["after"])
+        if len(after) != len(sort):
+            raise BadRequest("Bad Request - Invalid cursor.")
+        values = [to_python(column, value)
+                  for column, value in zip(columns, after)]
+        page_query = page_query.filter(seek_condition(sort, values))
+
+    items = page_query.limit(limit + 1).all()
+    has_next = len(items) > limit
+    items = items[:limit]
+    next_cursor = None
+    if has_next:
+        next_cursor = encode_cursor(cursor_values(items[-1], columns))
+
+    pagination = {"has_next": has_next, "next": next_cursor,
+                  "limit": limit, "total": total, "count_mode": mode}
+    return items, pagination
@@ -0,0 +1,118 @@
+"""
+Instrumented database connection pool
+
+Engine options (size, overflow, timeout, recycle, pre-ping) are built
+from the DB_POOL_* config by pool_options(). The pool reports these
+metrics (see /metrics) so pools can be sized per gunicorn worker:
+    db_pool_checkout_seconds     Time to hand out a connection, including
+                                 waiting, connecting, and pre-ping
+    db_pool_wait_seconds         Checkout time of the connections which
+                                 found the pool exhausted and had to wait
+                                 for another request to check one in
+    db_pool_connections_in_use   Connections currently checked out
+    db_pool_connects_total       New DBAPI connections opened
+    db_pool_invalidations_total  Connections discarded as dead, e.g. by
+                                 pre-ping after MySQL's wait_timeout
+
+Only public pool APIs are used, Pool.connect() is timed and the pool
+events are counted, so the metrics don't depend on SQLAlchemy internals.
+"""
+
+import time
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from app.utilities.metrics import Counter, Gauge, Histogram
+
+pool_buckets = (.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1.0,
+                2.5, 5.0, 10.0, 30.0)
+
+checkout_seconds = Histogram("db_pool_checkout_seconds",
+                             "Seconds to check out a pooled connection",
+                             buckets=pool_buckets)
+wait_seconds = Histogram("db_pool_wait_seconds",
+                         "Seconds to check out a connection from an "
+                         "exhausted pool", buckets=pool_buckets)
+in_use = Gauge("db_pool_connections_in_use",
+               "Pooled connections currently checked out",
+               multiprocess_mode="livesum")
+connects = Counter("db_pool_connects_total",
+                   "New database connections opened by the pool")
+invalidations = Counter("db_pool_invalidations_total",
+                        "Pooled connections invalidated")
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool timing connection checkouts and waits
+    """
+
+
+    def __init__(self, creator, max_overflow: int = 10, **kwargs):
+        super(InstrumentedQueuePool, self).__init__(
+            creator, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+
+
+    def exhausted(self) -> bool:
+        """
+        Check if a checkout has to wait for a connection to be checked in
+
+        Returns:
+            bool: True if no connection is idle and no more may be opened
+        """
+        return (self.max_overflow > -1 and self.checkedin() == 0
+                and self.overflow() >= self.max_overflow)
+
+
+    def connect(self):
+        waits = self.exhausted()
+        start = time.perf_counter()
+        connection = super(InstrumentedQueuePool, self).connect()
+        elapsed = time.perf_counter() - start
+        checkout_seconds.observe(elapsed)
+        if waits:
+            wait_seconds.observe(elapsed)
+        return connection
+
+
+@event.listens_for(InstrumentedQueuePool, "checkout")
+def count_checkout(dbapi_connection, connection_record, connection_proxy):
+    in_use.inc()
+
+
+@event.listens_for(InstrumentedQueuePool, "checkin")
+def count_checkin(dbapi_connection, connection_record):
+    in_use.dec()
+
+
+@event.listens_for(InstrumentedQueuePool, "connect")
+def count_connect(dbapi_connection, connection_record):
+    connects.inc()
+
+
+@event.listens_for(InstrumentedQueuePool, "invalidate")
+def count_invalidate(dbapi_connection, connection_record, exception):
+    invalidations.inc()
+
+
+def pool_options(config: dict) -> dict:
+    """
+    Build the engine options of the connection pool
+
+    Args:
+        config (dict): App config
+
+    Returns:
+        dict: Options for sqlalchemy.create_engine(), empty for SQLite
+              which doesn't use a QueuePool
+    """
+    if config["SQLALCHEMY_DATABASE_URI"].startswith("sqlite"):
+        return {}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_POOL_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
@@ -0,0 +1,235 @@
+"""
+Opt-in per request profiler
+
+A profiled request records every SQL statement (with its time and row
+count), every cache call, and the time spent encoding response bodies.
+Requests are profiled when:
+    - PROFILE_ENABLED is set, e.g. in development
+    - the request carries an X-Profile header signed with SECRET_KEY, see
+      profile_token()
+    - they are randomly sampled at PROFILE_SAMPLE_RATE (0 to 1)
+
+The breakdown of requests profiled because of config or header is
+attached to the response as a Server-Timing header and as JSON in an
+X-Profile header. Any profiled request slower than PROFILE_SLOW_SECONDS
+is logged with its full breakdown. Sampled requests are only logged so
+statements are never sent to clients which didn't ask for them.
+
+Unprofiled requests only pay for a flask.g lookup per statement and
+cache call.
+"""
+
+import json
+import time
+import random
+import logging
+from flask import current_app, g, has_request_context, request, Response
+from itsdangerous import BadSignature, TimestampSigner
+
+logger = logging.getLogger(__name__)
+
+profile_header = "X-Profile"
+profile_salt = "request-profile"
+
+# Bounds of the X-Profile response header
+max_statements = 50
+max_statement_length = 200
+
+
+class RequestProfile(object):
+    """
+    Breakdown of the time spent handling a request
+
+    Args:
+        attach (bool): Attach the breakdown to the response
+    """
+
+    __slots__ = ("attach", "start", "queries", "cache_calls", "serialize")
+
+
+    def __init__(self, attach: bool):
+        self.attach = attach
+        self.start = time.perf_counter()
+        self.queries = []
+        self.cache_calls = []
+        self.serialize = 0.0
+
+
+    def query(self, statement: str, seconds: float, rows: int):
+        """
+        Record an executed SQL statement
+
+        Args:
+            statement (str): SQL statement
+            seconds (float): Execution time
+            rows (int): Rows returned or affected, -1 if unknown
+        """
+        self.queries.append((statement, seconds, rows))
+
+
+    def cache_call(self, method: str, seconds: float):
+        """
+        Record a cache call
+
+        Args:
+            method (str): Name of the cache method called
+            seconds (float): Call time
+        """
+        self.cache_calls.append((method, seconds))
+
+
+    def as_dict(self, total: float) -> dict:
+        """
+        Summarize the profile, times are in milliseconds
+
+        Args:
+            total (float): Seconds the request took
+
+        Returns:
+            dict: Breakdown of the request
+        """
+        return {
+            "total_ms": round(total * 1000, 3),
+            "db_ms": round(sum(q[1] for q in self.queries) * 1000, 3),
+            "cache_ms": round(sum(c[1] for c in self.cache_calls) * 1000, 3),
+            "serialize_ms": round(self.serialize * 1000, 3),
+            "queries": [{"sql": sql[:max_statement_length],
+                         "ms": round(seconds * 1000, 3), "rows": rows}
+                        for sql, seconds, rows
+                        in self.queries[:max_statements]],
+            "cache_calls": [{"method": method, "ms": round(seconds * 1000, 3)}
+                            for method, seconds
+                            in self.cache_calls[:max_statements]],
+        }
+
+
+    def server_timing(self, summary: dict) -> str:
+        """
+        Format a summary as a Server-Timing header value
+
+        Args:
+            summary (dict): Result of as_dict()
+
+        Returns:
+            str: Header value
+        """
+        return (f"db;dur={summary['db_ms']};desc=\"{len(self.queries)} "
+                f"queries\", cache;dur={summary['cache_ms']};"
+                f"desc=\"{len(self.cache_calls)} calls\", "
+                f"serialize;dur={summary['serialize_ms']}, "
+                f"total;dur={summary['total_ms']}")
+
+
+def current_profile() -> RequestProfile:
+    """
+    Get the profile of the current request
+
+    Returns:
+        RequestProfile: Profile or None if the request isn't profiled
+    """
+    if not has_request_context():
+        return None
+    return g.get("profile")
+
+
+def profile_token(secret_key: str) -> str:
+    """
+    Create a value for the X-Profile request header
+
+    Args:
+        secret_key (str): SECRET_KEY of the app
+
+    Returns:
+        str: Signed token, valid for PROFILE_TOKEN_MAX_AGE seconds
+    """
+    signer = TimestampSigner(secret_key, salt=profile_salt)
+    return signer.sign("profile").decode("utf-8")
+
+
+def requested_by_header() -> bool:
+    """
+    Check whether the current request carries a valid X-Profile header
+
+    Returns:
+        bool: True if the header is signed with SECRET_KEY and not expired
+    """
+    token = request.headers.get(profile_header)
+    secret_key = current_app.config["SECRET_KEY"]
+    if not token or not secret_key:
+        return False
+    signer = TimestampSigner(secret_key, salt=profile_salt)
+    try:
+        signer.unsign(token, max_age=current_app.config[
+            "PROFILE_TOKEN_MAX_AGE"])
+    except BadSignature:
+        return False
+    return True
+
+
+def start_profile():
+    """
+    Start profiling the current request if enabled, requested, or
+    sampled. Registered as a before_request handler.
+    """
+    config = current_app.config
+    attach = config["PROFILE_ENABLED"] or requested_by_header()
+    if attach or random.random() < config["PROFILE_SAMPLE_RATE"]:
+        g.profile = RequestProfile(attach)
+
+
+def finish_profile(response: Response) -> Response:
+    """
+    Attach the profile of the current request to its response and log
+    it if the request was slow. Registered as an after_request handler.
+
+    Args:
+        response (Response): Response of the request
+
+    Returns:
+        Response: The same response
+    """
+    profile = current_profile()
+    if profile is None:
+        return response
+
+    total = time.perf_counter() - profile.start
+    summary = profile.as_dict(total)
+    if profile.attach:
+        response.headers["Server-Timing"] = profile.server_timing(summary)
+        response.headers[profile_header] = json.dumps(
+            summary, separators=(",", ":"))
+    if total >= current_app.config["PROFILE_SLOW_SECONDS"]:
+        logger.warning("Slow request %s %s: %s", request.method,
+                       request.full_path, json.dumps(summary))
+    return response
+
+
+class ProfiledCache(object):
+    """
+    Proxy of a Flask-Caching backend timing calls made by profiled
+    requests
+
+    Args:
+        backend (object): Cache backend
+    """
+
+
+    def __init__(self, backend: object):
+        self._backend = backend
+
+
+    def __getattr__(self, name: str) -> object:
+        attribute = getattr(self._backend, name)
+        if not callable(attribute):
+            return attribute
+
+        def timed(*args, **kwargs):
+            profile = current_profile()
+            if profile is None:
+                return attribute(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                profile.cache_call(name, time.perf_counter() - start)
+        return timed
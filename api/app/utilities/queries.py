@@ -0,0 +1,273 @@
+"""
+Query helpers which turn request query params into SQL for the generic
+controller.
+
+Filters are given as <column>=<value> for equality or
+<column>__<operator>=<value> where operator is one of:
+    gt, gte, lt, lte: range comparisons
+    in: comma separated list of values
+    prefix: string starts with value
+
+Sorting is given as ?sort=<column>,-<column> where "-" means descending.
+
+Only columns backed by a database index can be filtered or sorted on
+unless ALLOW_UNINDEXED_QUERIES is enabled, so a single request can't
+trigger a full table scan.
+"""
+
+from datetime import date, datetime, time
+from typing import List, Optional, Tuple
+from flask import current_app
+from flask_sqlalchemy import BaseQuery
+from sqlalchemy import and_, or_
+from werkzeug.exceptions import BadRequest
+from app.utilities.registry import ColumnDescriptor
+
+# Query params used by the generic controller which are not filters
+reserved_params = ("page", "per_page", "after", "limit", "count", "fields",
+                   "sort", "format")
+
+operators = {
+    "eq": lambda column, value: column == value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "in": lambda column, values: column.in_(values),
+    "prefix": lambda column, value: column.startswith(value, autoescape=True),
+}
+
+
+def check_indexed(model: type, key: str, usage: str):
+    """
+    Reject a filter or sort on a column without an index unless the app
+    allows unindexed queries, in which case it is only logged.
+
+    Args:
+        model (type): Model class
+        key (str): Column key
+        usage (str): "filter" or "sort", used in messages
+
+    Raises:
+        BadRequest: Column is not indexed
+    """
+    descriptor = model.descriptor()
+    if key in descriptor.indexed:
+        return
+    table = descriptor.table
+    if not current_app.config["ALLOW_UNINDEXED_QUERIES"]:
+        raise BadRequest(f"Bad Request - Can not {usage} {table} on "
+                         f"unindexed column {key}.")
+    current_app.logger.warning(f"Unindexed {usage} on {table}.{key}")
+
+
+def to_python(column: ColumnDescriptor, value: object) -> object:
+    """
+    Convert a query param or cursor value into the column's python type
+
+    Args:
+        column (ColumnDescriptor): Column of the model's descriptor
+        value (object): Value to convert
+
+    Raises:
+        BadRequest: Value can not be converted
+
+    Returns:
+        object: Converted value
+    """
+    python_type = column.python_type
+    if python_type is None or isinstance(value, python_type):
+        return value
+    try:
+        if python_type is bool:
+            return str(value).lower() in ("1", "true", "yes", "on")
+        if python_type in (datetime, date, time):
+            return python_type.fromisoformat(value)
+        return python_type(value)
+    except (TypeError, ValueError):
+        raise BadRequest(f"Bad Request - Invalid value {value} "
+                         f"for {column.key}.")
+
+
+def apply_filters(query: BaseQuery, model: type, args: dict) -> BaseQuery:
+    """
+    Compile filter query params into WHERE clauses on a query
+
+    Args:
+        query (BaseQuery): Query to filter
+        model (type): Model class being queried
+        args (dict): Request query params
+
+    Raises:
+        BadRequest: Unknown param, column, or operator
+        BadRequest: Column is not indexed
+
+    Returns:
+        BaseQuery: Filtered query
+    """
+    available = model.serializer().keys
+    columns = model.descriptor().columns
+    for param, value in args.items():
+        if param in reserved_params:
+            continue
+        key, _, operator = param.partition("__")
+        operator = operator or "eq"
+        if key not in available or operator not in operators:
+            raise BadRequest(f"Bad Request - Unknown query param {param}.")
+        check_indexed(model, key, "filter")
+
+        column = columns[key]
+        if operator == "in":
+            value = [to_python(column, v) for v in value.split(",")]
+        elif operator != "prefix":
+            value = to_python(column, value)
+        query = query.filter(operators[operator](column.attribute, value))
+    return query
+
+
+def parse_sort(model: type, args: dict) -> List[Tuple[object, bool]]:
+    """
+    Parse and validate the ?sort=a,-b param. The primary key is always
+    appended as the final tie breaker so the order is stable.
+
+    Args:
+        model (type): Model class being queried
+        args (dict): Request query params
+
+    Raises:
+        BadRequest: Unknown column
+        BadRequest: Column is not indexed
+
+    Returns:
+        List[Tuple[object, bool]]: [(model attribute, descending), ...]
+    """
+    descriptor = model.descriptor()
+    available = model.serializer().keys
+    sort = []
+    for key in filter(None, args.get("sort", "").split(",")):
+        descending = key.startswith("-")
+        key = key.lstrip("-")
+        if key not in available:
+            raise BadRequest(f"Bad Request - Unknown sort column {key}.")
+        check_indexed(model, key, "sort")
+        sort.append((descriptor.columns[key].attribute, descending))
+    if descriptor.pk.key not in [column.key for column, _ in sort]:
+        sort.append((descriptor.pk.attribute, False))
+    return sort
+
+
+def apply_sort(query: BaseQuery, sort: List[Tuple[object, bool]]):
+    """
+    Order a query by a parsed sort
+
+    Args:
+        query (BaseQuery): Query to order
+        sort (List[Tuple[object, bool]]): Sort from parse_sort()
+
+    Returns:
+        BaseQuery: Ordered query
+    """
+    return query.order_by(*[column.desc() if descending else column
+                            for column, descending in sort])
+
+
+def seek_condition(sort: List[Tuple[object, bool]], values: list) -> object:
+    """
+    Build the keyset condition for rows after the row with the given sort
+    values, e.g. for sort (a, id): a > :a OR (a = :a AND id > :id)
+
+    Args:
+        sort (List[Tuple[object, bool]]): Sort from parse_sort()
+        values (list): Sort values of the last row of the previous page
+
+    Returns:
+        object: SQLAlchemy boolean expression
+    """
+    clauses = []
+    for i, (column, descending) in enumerate(sort):
+        equal = [c == v for (c, _), v in zip(sort[:i], values[:i])]
+        step = column < values[i] if descending else column > values[i]
+        clauses.append(and_(*equal, step))
+    return or_(*clauses)
+
+
+def parse_fields(model: type, args: dict,
+                 include: List[str]=()) -> Optional[List[str]]:
+    """
+    Parse and validate the ?fields=a,b param against the columns the
+    model serializes. The primary key is always included so items can
+    be identified and paginated.
+
+    Args:
+        model (type): Model class being queried
+        args (dict): Request query params
+        include (List[str], optional): Other fields to always include,
+                                       such as sort columns.
+
+    Raises:
+        BadRequest: Unknown field requested
+
+    Returns:
+        Optional[List[str]]: Requested fields or None for all fields
+    """
+    if not args.get("fields"):
+        return None
+
+    available = model.serializer().keys
+    requested = [field.strip() for field in args["fields"].split(",")]
+    unknown = [field for field in requested if field not in available]
+    if unknown:
+        raise BadRequest(f"Bad Request - Unknown fields {unknown}.")
+
+    pk = model.descriptor().pk.key
+    fields = [pk] if pk not in requested else []
+    fields += [field for field in requested if field not in fields]
+    fields += [field for field in include if field not in fields]
+    return fields
+
+
+def parse_ids(model: type, args: dict, max_ids: int) -> List[object]:
+    """
+    Parse the ?ids=1,2,3 param of a batch get into primary key values,
+    dropping duplicates but keeping the requested order
+
+    Args:
+        model (type): Model class being queried
+        args (dict): Request query params
+        max_ids (int): Most IDs allowed
+
+    Raises:
+        BadRequest: Invalid, missing, or too many IDs
+
+    Returns:
+        List[object]: Primary key values
+    """
+    column = model.descriptor().pk
+    ids = []
+    for value in args["ids"].split(","):
+        _id = to_python(column, value.strip())
+        if _id not in ids:
+            ids.append(_id)
+    if not ids or len(ids) > max_ids:
+        raise BadRequest(f"Bad Request - ids must list 1 to {max_ids} IDs.")
+    return ids
+
+
+def project(query: BaseQuery, model: type,
+            fields: Optional[List[str]]) -> BaseQuery:
+    """
+    Restrict a query to only SELECT the requested columns. Rows of the
+    projected query are keyed tuples instead of model instances.
+
+    Args:
+        query (BaseQuery): Query to project
+        model (type): Model class being queried
+        fields (Optional[List[str]]): Fields to select or None for all
+
+    Returns:
+        BaseQuery: Projected query
+    """
+    if not fields:
+        return query
+    columns = model.descriptor().columns
+    return query.with_entities(*[columns[field].attribute for field in fields])
@@ -0,0 +1,138 @@
+"""
+Model descriptors - the column metadata of a model (types, nullability,
+defaults, indexes, unique keys) gathered once when the model is
+registered, so requests look it up instead of reflecting the model.
+Each descriptor also carries the model's serializer and its request
+body validator (see app/utilities/validation.py), compiled from the
+same metadata.
+
+Descriptors are immutable: records are named tuples and collections are
+tuples, frozensets, or read only mappings.
+"""
+
+from types import MappingProxyType
+from typing import Callable, Mapping, NamedTuple, Optional, Tuple
+from sqlalchemy import PrimaryKeyConstraint, UniqueConstraint
+from sqlalchemy.inspection import inspect
+from app.utilities.serializers import converter_for, Serializer
+from app.utilities.validation import Validator
+
+
+class ColumnDescriptor(NamedTuple):
+    """
+    Metadata of a single column
+    """
+    key: str
+    column: object
+    attribute: object
+    type: object
+    python_type: Optional[type]
+    converter: Optional[Callable]
+    nullable: bool
+    primary_key: bool
+    has_default: bool
+    required: bool
+    unique: bool
+    indexed: bool
+    max_length: Optional[int]
+    serialized: bool
+
+
+class ModelDescriptor(NamedTuple):
+    """
+    Metadata of a model, see describe()
+    """
+    model: type
+    table: str
+    pk: ColumnDescriptor
+    columns: Mapping[str, ColumnDescriptor]
+    required: frozenset
+    indexed: frozenset
+    unique_keys: Tuple[Tuple[str, ...], ...]
+    indexes: Tuple[Tuple[str, ...], ...]
+    serializer: Serializer
+    validator: Validator
+
+
+def python_type_of(column_type: object) -> Optional[type]:
+    """
+    Get the python type of a column type
+
+    Args:
+        column_type (object): SQLAlchemy column type
+
+    Returns:
+        Optional[type]: Python type or None if the type doesn't define one
+    """
+    try:
+        return column_type.python_type
+    except NotImplementedError:
+        return None
+
+
+def describe(model: type) -> ModelDescriptor:
+    """
+    Build the descriptor of a model class
+
+    Args:
+        model (type): Model class
+
+    Returns:
+        ModelDescriptor: Descriptor of the model
+    """
+    table = model.__table__
+    exclude = set(getattr(model, "__serialize_exclude__", ()))
+
+    unique_keys = tuple(tuple(c.key for c in constraint.columns)
+                        for constraint in table.constraints
+                        if isinstance(constraint, (PrimaryKeyConstraint,
+                                                   UniqueConstraint)))
+    unique_keys += tuple((c.key,) for c in table.columns
+                         if c.unique and (c.key,) not in unique_keys)
+    indexes = tuple(tuple(c.key for c in index.columns)
+                    for index in table.indexes)
+    # Filters and sorts can use an index led by the column
+    indexed = frozenset(key[0] for key in unique_keys + indexes) | \
+              frozenset(c.key for c in table.columns if c.index)
+
+    mapper = inspect(model)
+    columns = {}
+    for attr in mapper.column_attrs:
+        column = attr.columns[0]
+        has_default = column.default is not None or \
+                      column.server_default is not None
+        columns[attr.key] = ColumnDescriptor(
+            key=attr.key,
+            column=column,
+            attribute=getattr(model, attr.key),
+            type=column.type,
+            python_type=python_type_of(column.type),
+            converter=converter_for(column.type),
+            nullable=bool(column.nullable),
+            primary_key=column.primary_key,
+            has_default=has_default,
+            required=not column.nullable and not has_default
+                     and not column.primary_key,
+            unique=(attr.key,) in unique_keys,
+            indexed=attr.key in indexed,
+            max_length=getattr(column.type, "length", None),
+            serialized=attr.key not in exclude,
+        )
+
+    pk = columns[mapper.get_property_by_column(mapper.primary_key[0]).key]
+    input_types = getattr(model, "__input_types__", {})
+    min_lengths = getattr(model, "__min_lengths__", {})
+    return ModelDescriptor(
+        model=model,
+        table=table.name,
+        pk=pk,
+        columns=MappingProxyType(columns),
+        required=frozenset(c.key for c in columns.values() if c.required),
+        indexed=indexed,
+        unique_keys=unique_keys,
+        indexes=indexes,
+        serializer=Serializer(tuple((c.key, c.converter)
+                                    for c in columns.values()
+                                    if c.serialized)),
+        validator=Validator.for_columns(columns, input_types, min_lengths),
+    )
@@ -0,0 +1,135 @@
+"""
+Read replica routing
+
+When DB_REPLICA_URIS is set every replica becomes a SQLAlchemy bind
+("replica_0", "replica_1", ...) and views decorated with read_only() run
+their queries on the replicas, round robin. Everything else, including
+every CRUDMixin write and any flush, goes to the primary.
+
+Read-your-writes - replicas lag behind the primary, so reads go to the
+primary instead when:
+    - the client wrote within the last REPLICA_STICKY_SECONDS, tracked
+      by a cookie set on the response of every successful write
+    - the model was written by anyone within REPLICA_STICKY_SECONDS,
+      so cached responses recomputed right after a write are never
+      filled from a replica which hasn't caught up yet
+"""
+
+import time
+from functools import wraps
+from flask import current_app, g, has_app_context, request, Response
+from flask_sqlalchemy import get_state, SignallingSession
+from app.utilities.metrics import Counter
+
+sticky_cookie = "db_sticky"
+read_methods = ("GET", "HEAD", "OPTIONS")
+
+routed_reads = Counter("db_routed_reads_total",
+                       "Read only requests by the database they were "
+                       "routed to", ("target",))
+
+
+def replica_binds(uris: list) -> dict:
+    """
+    Build SQLAlchemy binds of replicas
+
+    Args:
+        uris (list): URIs of the replicas
+
+    Returns:
+        dict: {bind key: URI}
+    """
+    return {f"replica_{index}": uri for index, uri in enumerate(uris)}
+
+
+class RoutingSession(SignallingSession):
+    """
+    Flask-SQLAlchemy session running the queries of read only views on
+    the replica picked for the request
+    """
+
+
+    def get_bind(self, mapper=None, clause=None):
+        replica = g.get("replica") if has_app_context() else None
+        if replica is not None and not self._flushing:
+            return get_state(self.app).db.get_engine(self.app, bind=replica)
+        return super(RoutingSession, self).get_bind(mapper, clause)
+
+
+def recently_written(model: str) -> bool:
+    """
+    Check whether a model was written within REPLICA_STICKY_SECONDS. A
+    model without a recorded write in the cache (never written, or
+    evicted) was not recently written.
+
+    Args:
+        model (str): Name of the model
+
+    Returns:
+        bool: True if replicas may not have the write yet
+    """
+    from app.models import descriptors
+    from app.utilities.caching import written_key
+    from app.utilities.extensions.cache import cache
+    if model not in descriptors:
+        return False
+    written = cache.get(written_key(descriptors[model]))
+    if written is None:
+        return False
+    sticky = current_app.config["REPLICA_STICKY_SECONDS"]
+    return time.time() * 1000000 - written < sticky * 1000000
+
+
+def client_is_sticky() -> bool:
+    """
+    Check whether the client of the current request wrote within
+    REPLICA_STICKY_SECONDS
+
+    Returns:
+        bool: True if the client should read its writes from the primary
+    """
+    try:
+        return float(request.cookies.get(sticky_cookie, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_only(view):
+    """
+    Decorator routing the queries of a view taking (model, ...) to a
+    replica, unless read-your-writes requires the primary
+    """
+    @wraps(view)
+    def wrapper(model:str, *args, **kwargs):
+        replicas = current_app.extensions.get("replicas")
+        if replicas is None:
+            return view(model, *args, **kwargs)
+
+        if client_is_sticky() or recently_written(model):
+            routed_reads.labels(target="primary").inc()
+            return view(model, *args, **kwargs)
+
+        # Kept for the rest of the request so streamed responses which
+        # query after the view returns still use the replica
+        g.replica = next(replicas)
+        routed_reads.labels(target=g.replica).inc()
+        return view(model, *args, **kwargs)
+    return wrapper
+
+
+def stick_after_write(response: Response) -> Response:
+    """
+    Make the client read from the primary for REPLICA_STICKY_SECONDS
+    after a successful write. Registered as an after_request handler.
+
+    Args:
+        response (Response): Response of the request
+
+    Returns:
+        Response: The same response
+    """
+    if request.method not in read_methods and response.status_code < 400:
+        sticky = current_app.config["REPLICA_STICKY_SECONDS"]
+        response.set_cookie(sticky_cookie, str(time.time() + sticky),
+                            max_age=sticky, httponly=True)
+    return response
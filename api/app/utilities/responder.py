@@ -2,10 +2,16 @@
 Generic Data Response - contains a class used to keep data responses generic
 """
 
-import json
-import flask_sqlalchemy
+import time
 from typing import Tuple
-from flask import jsonify, Response
+from flask import current_app, Response
+from app.utilities.metrics import Histogram
+from app.utilities.profiler import current_profile
+
+serialization_seconds = Histogram("responder_serialization_seconds",
+                                  "Seconds to encode a response body",
+                                  buckets=(.0001, .0005, .001, .0025, .005,
+                                           .01, .025, .05, .1, .25, .5, 1.0))
 
 
 class Responder(object):
@@ -79,10 +85,23 @@ class Responder(object):
     @property
     def response(self) -> Tuple[Response, int]:
         """
-        Create a flask jsonify response object with self dict as data,
-        update the status code of the response, then return it.
+        Create a flask response object with self dict encoded as JSON by
+        the app's JSON backend, update the status code of the response,
+        then return it.
 
         Returns:
             Tuple[Response, int]: Flask Response & HTTP status code
         """
-        return (jsonify(self.as_dict), self.http_code)
+        config = current_app.config
+        pretty = config["JSONIFY_PRETTYPRINT_REGULAR"] or current_app.debug
+        encoder = current_app.extensions["json_encoder"]
+        start = time.perf_counter()
+        body = encoder.dumps(self.as_dict, pretty=pretty)
+        seconds = time.perf_counter() - start
+        serialization_seconds.observe(seconds)
+        profile = current_profile()
+        if profile is not None:
+            profile.serialize += seconds
+        response = Response(body, status=self.http_code,
+                            mimetype=config["JSONIFY_MIMETYPE"])
+        return (response, self.http_code)
@@ -0,0 +1,115 @@
+"""
+Model serializers - convert model instances into JSON ready dicts using
+converters that are chosen once per column type instead of per row.
+"""
+
+import base64
+from typing import Callable
+from sqlalchemy import types
+
+
+def iso_format(value: object) -> str:
+    """
+    Convert a date, datetime, or time into an ISO 8601 string
+
+    Args:
+        value (object): date, datetime, or time value
+
+    Returns:
+        str: ISO 8601 formatted value
+    """
+    return value.isoformat()
+
+
+def base64_encode(value: bytes) -> str:
+    """
+    Convert bytes into a base64 string
+
+    Args:
+        value (bytes): Binary value
+
+    Returns:
+        str: base64 encoded value
+    """
+    return base64.b64encode(value).decode("ascii")
+
+
+# Ordered from most to least specific, first matching type wins. Types
+# without a converter are already JSON friendly and are passed through.
+converters = (
+    (types.DateTime, iso_format),
+    (types.Date, iso_format),
+    (types.Time, iso_format),
+    (types.Interval, lambda value: value.total_seconds()),
+    (types.LargeBinary, base64_encode),
+    (types.Float, float),
+    (types.Numeric, str),
+)
+
+
+def converter_for(column_type: types.TypeEngine) -> Callable:
+    """
+    Get the converter for a column type
+
+    Args:
+        column_type (types.TypeEngine): SQLAlchemy column type
+
+    Returns:
+        Callable: Converter function or None if values can be used as is
+    """
+    for type_, converter in converters:
+        if isinstance(column_type, type_):
+            return converter
+    return None
+
+
+class Serializer(object):
+    """
+    Serializer for a single model class, built by the model's descriptor
+    (see app/utilities/registry.py). Columns listed in the model's
+    `__serialize_exclude__` attribute are never serialized.
+
+    Args:
+        fields (tuple): ((key, converter), ...) pairs to serialize
+    """
+
+    __slots__ = ("fields", "keys")
+
+
+    def __init__(self, fields: tuple):
+        self.fields = fields
+        self.keys = frozenset(key for key, _ in fields)
+
+
+    def subset(self, keys: list) -> "Serializer":
+        """
+        Build a serializer of only some of the fields, in the given order
+
+        Args:
+            keys (list): Keys of the fields to keep
+
+        Returns:
+            Serializer: Serializer of the subset of fields
+        """
+        fields = dict(self.fields)
+        return Serializer(tuple((key, fields[key]) for key in keys))
+
+
+    def __call__(self, obj: object) -> dict:
+        """
+        Serialize an object with attributes matching the serializer's
+        fields, such as a model instance or a row of a projected query
+
+        Args:
+            obj (object): Model instance or row
+
+        Returns:
+            dict: JSON ready dict of the object
+        """
+        out = {}
+        for key, convert in self.fields:
+            value = getattr(obj, key)
+            if convert is not None and value is not None:
+                value = convert(value)
+            out[key] = value
+        return out
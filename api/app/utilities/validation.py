@@ -0,0 +1,252 @@
+"""
+Request body validation compiled per model from its column metadata.
+
+Every column gets a check chosen once from its python type, length, and
+nullability, so validating a body is a dict lookup and a type check per
+field. Bodies are validated before any database work and every invalid
+field is reported, as a list of {"field": key, "error": message} in the
+"errors" of the 400 response.
+
+JSON has no dates or bytes, so date, datetime, and time columns take ISO
+8601 strings and binary columns take base64 strings. Models can accept
+other input for a column, e.g. a password hashed by the model, by
+mapping its key to a python type in `__input_types__`, and require a
+minimum length of string input by mapping its key to the length in
+`__min_lengths__`.
+"""
+
+import base64
+import binascii
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Callable, List, Tuple
+from werkzeug.exceptions import BadRequest
+
+# Checks take (value, max_length) and return (value converted to the
+# column's python type, error or None)
+Checked = Tuple[object, str]
+
+
+class ValidationError(BadRequest):
+    """
+    Bad Request with the errors of each invalid field
+
+    Args:
+        errors (List[dict]): [{"field": key, "error": message}, ...]
+    """
+
+
+    def __init__(self, errors: List[dict]):
+        super().__init__("Bad Request - Invalid fields.")
+        self.errors = errors
+
+
+def check_str(value: object, max_length: int) -> Checked:
+    """Check a string column, within its length"""
+    if type(value) is not str:
+        return value, "must be a string"
+    if max_length is not None and len(value) > max_length:
+        return value, f"must be at most {max_length} characters"
+    return value, None
+
+
+def check_int(value: object, max_length: int) -> Checked:
+    """Check an integer column, booleans are rejected"""
+    if type(value) is not int:
+        return value, "must be an integer"
+    return value, None
+
+
+def check_float(value: object, max_length: int) -> Checked:
+    """Check a float column"""
+    if type(value) not in (int, float):
+        return value, "must be a number"
+    return float(value), None
+
+
+def check_decimal(value: object, max_length: int) -> Checked:
+    """Check a numeric column, converting to Decimal"""
+    if type(value) not in (int, float, str):
+        return value, "must be a number"
+    try:
+        return Decimal(str(value)), None
+    except ArithmeticError:
+        return value, "must be a number"
+
+
+def check_bool(value: object, max_length: int) -> Checked:
+    """Check a boolean column"""
+    if type(value) is not bool:
+        return value, "must be a boolean"
+    return value, None
+
+
+def check_bytes(value: object, max_length: int) -> Checked:
+    """Check a binary column, decoding base64 within its length"""
+    if type(value) is not str:
+        return value, "must be a base64 string"
+    try:
+        value = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        return value, "must be a base64 string"
+    if max_length is not None and len(value) > max_length:
+        return value, f"must be at most {max_length} bytes"
+    return value, None
+
+
+def iso_check(python_type: type, name: str) -> Callable:
+    """
+    Build the check of a date, datetime, or time column
+
+    Args:
+        python_type (type): date, datetime, or time
+        name (str): Name of the type used in errors
+
+    Returns:
+        Callable: Check parsing ISO 8601 strings
+    """
+    def check(value: object, max_length: int) -> Checked:
+        if type(value) is not str:
+            return value, f"must be an ISO 8601 {name}"
+        try:
+            return python_type.fromisoformat(value), None
+        except ValueError:
+            return value, f"must be an ISO 8601 {name}"
+    return check
+
+
+def check_any(value: object, max_length: int) -> Checked:
+    """Accept any value for columns without a python type"""
+    return value, None
+
+
+def min_length_check(check: Callable, min_length: int) -> Callable:
+    """
+    Build a check which also requires a minimum length
+
+    Args:
+        check (Callable): Check of the column's type
+        min_length (int): Minimum length of the value
+
+    Returns:
+        Callable: Check rejecting shorter values
+    """
+    error = "may not be empty" if min_length == 1 else \
+            f"must be at least {min_length} characters"
+
+    def checked(value: object, max_length: int) -> Checked:
+        value, type_error = check(value, max_length)
+        if type_error is None and len(value) < min_length:
+            return value, error
+        return value, type_error
+    return checked
+
+
+# Checks by python type of the column, types without one aren't checked
+checks = {
+    str: check_str,
+    int: check_int,
+    float: check_float,
+    Decimal: check_decimal,
+    bool: check_bool,
+    bytes: check_bytes,
+    datetime: iso_check(datetime, "datetime"),
+    date: iso_check(date, "date"),
+    time: iso_check(time, "time"),
+}
+
+
+class Validator(object):
+    """
+    Validator of the request bodies of a model
+
+    Args:
+        fields (dict): {key: (check, max_length, nullable)} of each column
+        required (tuple): Keys which must be given on create
+    """
+
+    __slots__ = ("fields", "required")
+
+
+    def __init__(self, fields: dict, required: tuple):
+        self.fields = fields
+        self.required = required
+
+
+    @classmethod
+    def for_columns(cls, columns: dict, input_types: dict,
+                    min_lengths: dict=None) -> "Validator":
+        """
+        Compile the validator of a model's columns
+
+        Args:
+            columns (dict): {key: ColumnDescriptor} of the model
+            input_types (dict): {key: python type} accepted instead of the
+                                column's own type, without its length
+            min_lengths (dict, optional): {key: minimum length} of string
+                                          input. Defaults to None.
+
+        Returns:
+            Validator: Validator of the columns
+        """
+        min_lengths = min_lengths or {}
+        fields = {}
+        for key, column in columns.items():
+            if key in input_types:
+                check = checks.get(input_types[key], check_any)
+                max_length = None
+            else:
+                check = checks.get(column.python_type, check_any)
+                max_length = column.max_length
+            if key in min_lengths:
+                check = min_length_check(check, min_lengths[key])
+            fields[key] = (check, max_length, column.nullable)
+        required = tuple(key for key, column in columns.items()
+                         if column.required)
+        return cls(fields, required)
+
+
+    def __call__(self, data: object, partial: bool=False) -> dict:
+        """
+        Validate a request body
+
+        Args:
+            data (object): Loaded JSON body
+            partial (bool, optional): Skip the required columns check,
+                                      used for updates. Defaults to False.
+
+        Raises:
+            ValidationError: Body is not an object or has invalid fields
+
+        Returns:
+            dict: Column values, converted to the columns' python types
+        """
+        if type(data) is not dict:
+            raise ValidationError([{"field": None,
+                                    "error": "must be a JSON object"}])
+
+        values, errors = {}, []
+        fields = self.fields
+        for key, value in data.items():
+            field = fields.get(key)
+            if field is None:
+                errors.append({"field": key, "error": "unknown field"})
+                continue
+            check, max_length, nullable = field
+            if value is None:
+                if not nullable:
+                    errors.append({"field": key, "error": "may not be null"})
+                values[key] = None
+                continue
+            value, error = check(value, max_length)
+            if error is not None:
+                errors.append({"field": key, "error": error})
+            values[key] = value
+
+        if not partial:
+            errors += [{"field": key, "error": "is required"}
+                       for key in self.required if key not in data]
+
+        if errors:
+            raise ValidationError(errors)
+        return values
@@ -0,0 +1,5 @@
+"""
+Benchmarks for the API. Run each module from the api directory, e.g.:
+
+    python -m benchmarks.bench_encoders
+"""
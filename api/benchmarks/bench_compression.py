@@ -0,0 +1,66 @@
+"""
+Benchmark of response compression on typical read_all payloads: CPU time
+per request and bytes on the wire for raw, compressed on the fly, and
+precompressed cached responses.
+
+    python -m benchmarks.bench_compression [--number 500]
+"""
+
+import time
+import argparse
+from flask import Flask, Response
+from app.utilities.encoders import get_encoder
+from app.utilities.compression import available_encodings, compress
+from benchmarks.bench_encoders import read_all_payload
+
+
+def cpu_us(func, number: int) -> float:
+    """
+    Measure the average CPU time of a function call
+
+    Args:
+        func (Callable): Function to call
+        number (int): Number of calls
+
+    Returns:
+        float: Microseconds of CPU time per call
+    """
+    start = time.process_time()
+    for _ in range(number):
+        func()
+    return (time.process_time() - start) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=500,
+                        help="Requests per measurement (Default: 500)")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object("app.config.Config")
+    encoder = get_encoder(app.config["JSON_BACKEND"])
+
+    print(f"{'payload':<14}{'mode':<18}{'cpu us/req':>12}{'bytes':>10}")
+    with app.app_context():
+        for model in ("fruits", "users"):
+            for rows in (20, 100, 1000):
+                payload = read_all_payload(rows, model)
+                body = encoder.dumps(payload)
+                label = f"{model}x{rows}"
+                seconds = cpu_us(lambda: Response(body), args.number)
+                print(f"{label:<14}{'raw':<18}{seconds:>12.1f}{len(body):>10}")
+                for encoding in available_encodings():
+                    compressed = compress(body, encoding)
+                    seconds = cpu_us(
+                        lambda: Response(compress(body, encoding)),
+                        args.number)
+                    print(f"{label:<14}{encoding + ' on the fly':<18}"
+                          f"{seconds:>12.1f}{len(compressed):>10}")
+                    seconds = cpu_us(lambda: Response(compressed),
+                                     args.number)
+                    print(f"{label:<14}{encoding + ' cached':<18}"
+                          f"{seconds:>12.1f}{len(compressed):>10}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Micro-benchmark of the JSON encoder backends on typical read_all payloads,
+with flask.jsonify (the previous Responder implementation) as baseline.
+
+    python -m benchmarks.bench_encoders [--number 2000]
+"""
+
+import argparse
+import timeit
+from datetime import datetime
+from flask import Flask, jsonify
+from app.utilities.encoders import available_backends, get_encoder
+
+
+def read_all_payload(rows: int, model: str) -> dict:
+    """
+    Build a Responder dict shaped like a read_all response
+
+    Args:
+        rows (int): Number of results in the page
+        model (str): "fruits" or "users"
+
+    Returns:
+        dict: Response payload
+    """
+    created_at = datetime(2019, 7, 1, 12, 30).isoformat()
+    if model == "users":
+        results = [{"id": i, "email": f"user{i}@example.com", "admin": False,
+                    "created_at": created_at} for i in range(rows)]
+    else:
+        results = [{"id": i, "name": f"Fruit number {i}"} for i in range(rows)]
+    pagination = {"has_next": True, "next_num": 2, "has_prev": False,
+                  "prev_num": None, "page": 1, "pages": 50,
+                  "per_page": rows, "total": rows * 50}
+    return {"success": True, "http_code": 200, "msg": None,
+            "results": results, "pagination": pagination}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=2000,
+                        help="Encodes per measurement (Default: 2000)")
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    print(f"{'payload':<14}{'backend':<10}{'us/encode':>12}{'bytes':>10}")
+    for model in ("fruits", "users"):
+        for rows in (20, 100):
+            payload = read_all_payload(rows, model)
+            label = f"{model}x{rows}"
+
+            with app.app_context():
+                seconds = timeit.timeit(lambda: jsonify(payload).get_data(),
+                                        number=args.number)
+                size = len(jsonify(payload).get_data())
+            print(f"{label:<14}{'jsonify':<10}"
+                  f"{seconds / args.number * 1e6:>12.1f}{size:>10}")
+
+            for name in available_backends():
+                encoder = get_encoder(name)
+                seconds = timeit.timeit(lambda: encoder.dumps(payload),
+                                        number=args.number)
+                size = len(encoder.dumps(payload))
+                print(f"{label:<14}{name:<10}"
+                      f"{seconds / args.number * 1e6:>12.1f}{size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark of app startup, the time for a fresh interpreter to import the
+app and run create_app("Prod") against a SQLite database, i.e. the cold
+start of a gunicorn worker.
+
+    legacy boot  Database and tables probed and created on every boot,
+                 Flask-Migrate (alembic) always imported
+    worker boot  Schema bootstrap left to "flask init-db", migrations
+                 only imported by the flask CLI
+
+Probes against MySQL are network round trips, so the gap is wider in
+production than measured here.
+
+    python -m benchmarks.bench_startup [--number 10]
+"""
+
+import os
+import sys
+import argparse
+import tempfile
+import subprocess
+
+boot = ("import time; start = time.perf_counter(); "
+        "from app.factory import create_app; create_app('Prod'); "
+        "print(time.perf_counter() - start)")
+
+modes = {
+    "legacy boot": {"DB_AUTO_CREATE": "true", "FLASK_RUN_FROM_CLI": "true"},
+    "worker boot": {"DB_AUTO_CREATE": "false", "FLASK_RUN_FROM_CLI": ""},
+}
+
+
+def boot_seconds(env: dict) -> float:
+    """
+    Boot the app in a fresh interpreter
+
+    Args:
+        env (dict): Environment of the interpreter
+
+    Returns:
+        float: Seconds from the first app import to create_app returning
+    """
+    output = subprocess.check_output([sys.executable, "-c", boot], env=env,
+                                     cwd=os.path.dirname(os.path.dirname(
+                                         os.path.abspath(__file__))))
+    return float(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=10,
+                        help="Boots per mode (Default: 10)")
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="api-bench-"), "boot.db")
+    base_env = dict(os.environ, CACHE_TYPE="simple",
+                    SQLALCHEMY_DATABASE_URI=f"sqlite:///{db_path}")
+    # Create the schema once so both modes boot against the same database
+    boot_seconds(dict(base_env, **modes["legacy boot"]))
+
+    print(f"{'mode':<14}{'mean ms':>10}{'min ms':>10}{'max ms':>10}")
+    for mode, overrides in modes.items():
+        env = dict(base_env, **overrides)
+        seconds = [boot_seconds(env) for _ in range(args.number)]
+        print(f"{mode:<14}{sum(seconds) / len(seconds) * 1000:>10.1f}"
+              f"{min(seconds) * 1000:>10.1f}{max(seconds) * 1000:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark of the compiled request body validators, on valid and
+invalid create and update bodies of fruits and users, plus the whole
+request of an invalid create rejected before any database work (run in
+process against create_app("Testing") like benchmarks.suite).
+
+    python -m benchmarks.bench_validation [--number 20000]
+"""
+
+import argparse
+import timeit
+from sqlalchemy import event
+from benchmarks.suite import configure
+from app.utilities.validation import ValidationError
+
+bodies = (
+    ("fruits", "create", False, {"name": "Fruit number 1"}),
+    ("fruits", "too long", False, {"name": "x" * 40}),
+    ("fruits", "unknown", False, {"name": 1, "color": "red"}),
+    ("users", "create", False, {"email": "user1@example.com",
+                                "password": "password", "admin": False,
+                                "created_at": "2019-07-01T12:30:00"}),
+    ("users", "update", True, {"admin": True}),
+    ("users", "invalid", True, {"admin": "yes", "created_at": "noon"}),
+)
+
+
+def validate(validator: object, body: dict, partial: bool):
+    """
+    Validate a body, swallowing the errors of invalid ones
+
+    Args:
+        validator (Validator): Validator of the model
+        body (dict): Request body
+        partial (bool): Validate as an update
+    """
+    try:
+        validator(body, partial=partial)
+    except ValidationError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-n", "--number", type=int, default=20000,
+                        help="Validations per measurement (Default: 20000)")
+    args = parser.parse_args()
+
+    configure("simple")
+    from app.factory import create_app
+    from app.models import descriptors
+    from app.utilities.extensions.db import db
+    app = create_app("Testing")
+
+    print(f"{'model':<8}{'body':<10}{'us/validate':>13}")
+    for model, name, partial, body in bodies:
+        validator = descriptors[model].validator
+        seconds = timeit.timeit(lambda: validate(validator, body, partial),
+                                number=args.number)
+        print(f"{model:<8}{name:<10}{seconds / args.number * 1e6:>13.2f}")
+
+    statements = [0]
+    with app.app_context():
+        @event.listens_for(db.engine, "after_cursor_execute")
+        def count_statement(*args):
+            statements[0] += 1
+
+    client = app.test_client()
+    number = max(1, args.number // 10)
+    seconds = timeit.timeit(
+        lambda: client.post("/fruits", json={"name": "x" * 40}),
+        number=number)
+    print(f"\nPOST /fruits with an invalid body: "
+          f"{seconds / number * 1e6:.1f} us/request, "
+          f"{statements[0] / number:.2f} SQL statements/request")
+
+if __name__ == "__main__":
+    main()
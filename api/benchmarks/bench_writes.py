@@ -0,0 +1,93 @@
+"""
+Benchmark of the single item write paths of the generic controller, run
+in process against create_app("Testing") with a fresh SQLite database
+like benchmarks.suite.
+
+    orm     SELECT the item, mutate or delete it through the ORM, then
+            flush (SINGLE_STATEMENT_WRITES=false)
+    single  One UPDATE/DELETE ... WHERE id=:id, a 404 is decided by the
+            affected row count (SINGLE_STATEMENT_WRITES=true)
+
+Reports throughput, p50/p95 latency, and SQL statements per request of
+updating and deleting existing fruits, updating missing fruits (404),
+and updating users. Requests are sent sequentially since SQLite only
+has one writer. Statements against MySQL are network round trips, so
+the gap is wider in production than measured here.
+
+    python -m benchmarks.bench_writes [--rows 2000] [--requests 500]
+"""
+
+import argparse
+from sqlalchemy import event
+from benchmarks.suite import configure, run, seed
+
+modes = {"orm": False, "single": True}
+
+
+def scenarios(requests: int, mode_index: int) -> list:
+    """
+    Build the benchmarked scenarios of a mode. Updates reuse the first
+    --requests fruits and users, deletes use a separate range of fruits
+    per mode.
+
+    Args:
+        requests (int): Requests per scenario
+        mode_index (int): Index of the mode, picks its range of deletes
+
+    Returns:
+        list: [(name, method, expected status,
+                build request(index) -> (url, json))]
+    """
+    first_deleted = requests * (mode_index + 1)
+    return [
+        ("update_fruit", "put", 200,
+         lambda index: (f"/fruits/{index + 1}", {"name": f"Updated {index}"})),
+        ("update_missing", "put", 404,
+         lambda index: (f"/fruits/{10 ** 9 + index}", {"name": "Missing"})),
+        ("update_user", "put", 200,
+         lambda index: (f"/users/{index + 1}",
+                        {"email": f"updated{mode_index}-{index}@example.com"})),
+        ("delete_fruit", "delete", 200,
+         lambda index: (f"/fruits/{first_deleted + index + 1}", None)),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--rows", type=int, default=2000,
+                        help="Rows seeded per model (Default: 2000)")
+    parser.add_argument("-n", "--requests", type=int, default=500,
+                        help="Requests per scenario (Default: 500)")
+    args = parser.parse_args()
+    if args.rows < (len(modes) + 1) * args.requests:
+        parser.error(f"--rows must be at least {len(modes) + 1} times "
+                     f"--requests so every mode has rows to delete")
+
+    configure("simple")
+    from app.factory import create_app
+    from app.utilities.extensions.db import db
+    app = create_app("Testing")
+    seed(app, args.rows)
+
+    statements = [0]
+    with app.app_context():
+        @event.listens_for(db.engine, "after_cursor_execute")
+        def count_statement(*args):
+            statements[0] += 1
+
+    print(f"{'scenario':<16}{'mode':<8}{'rps':>10}{'p50 ms':>10}"
+          f"{'p95 ms':>10}{'stmts/req':>11}{'errors':>8}")
+    for mode_index, (mode, single) in enumerate(modes.items()):
+        app.config["SINGLE_STATEMENT_WRITES"] = single
+        for name, method, expected, build in scenarios(args.requests,
+                                                       mode_index):
+            statements[0] = 0
+            result = run(app, method, build, args.requests, 1,
+                         expected=expected)
+            print(f"{name:<16}{mode:<8}{result['rps']:>10}"
+                  f"{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                  f"{statements[0] / args.requests:>11.2f}"
+                  f"{result['errors']:>8}")
+
+if __name__ == "__main__":
+    main()
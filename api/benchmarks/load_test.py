@@ -0,0 +1,84 @@
+"""
+HTTP load test of a running API, used to compare serving modes at high
+concurrency. Start the server in each mode and run the same load test
+against both, e.g.
+
+    SERVING_MODE=sync gunicorn 'app.factory:create_app("Prod")' -c gunicorn_conf.py
+    SERVING_MODE=gevent gunicorn 'app.factory:create_app("Prod")' -c gunicorn_conf.py
+
+    python -m benchmarks.load_test --url http://localhost:8000/fruits \
+        [--concurrency 200] [--duration 30]
+
+To load the database rather than redis start the server with CACHE_TYPE=null.
+CACHE_DEFAULT_TIMEOUT=0 alone is not enough, expired records are still
+served stale for CACHE_STALE_TIMEOUT seconds, so set CACHE_STALE_TIMEOUT=0
+as well. gevent only pays off when requests wait on network I/O, run the
+comparison against the production database rather than a local SQLite file,
+where the route is CPU bound and both modes serve about the same throughput.
+"""
+
+import time
+import argparse
+import threading
+import requests
+from benchmarks.stats import percentile
+
+
+def client(url: str, deadline: float, latencies: list, errors: list):
+    """
+    Send requests one after another over a keep-alive connection until
+    the deadline
+
+    Args:
+        url (str): URL to request
+        deadline (float): time.monotonic() to stop at
+        latencies (list): Appended with the seconds of each response
+        errors (list): Appended with each failed request
+    """
+    session = requests.Session()
+    while time.monotonic() < deadline:
+        start = time.monotonic()
+        try:
+            response = session.get(url, timeout=30)
+            ok = response.status_code < 500
+        except requests.RequestException as error:
+            ok = False
+            response = error
+        if ok:
+            latencies.append(time.monotonic() - start)
+        else:
+            errors.append(response)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-u", "--url", default="http://localhost:8000/fruits",
+                        help="URL to request (Default: "
+                             "http://localhost:8000/fruits)")
+    parser.add_argument("-c", "--concurrency", type=int, default=200,
+                        help="Concurrent clients (Default: 200)")
+    parser.add_argument("-d", "--duration", type=float, default=30,
+                        help="Seconds to run for (Default: 30)")
+    args = parser.parse_args()
+
+    latencies, errors = [], []
+    deadline = time.monotonic() + args.duration
+    threads = [threading.Thread(target=client, daemon=True,
+                                args=(args.url, deadline, latencies, errors))
+               for _ in range(args.concurrency)]
+    start = time.monotonic()
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    elapsed = time.monotonic() - start
+
+    latencies.sort()
+    print(f"url          {args.url}")
+    print(f"concurrency  {args.concurrency}")
+    print(f"requests     {len(latencies)}")
+    print(f"errors       {len(errors)}")
+    print(f"req/s        {len(latencies) / elapsed:.1f}")
+    for pct in (50, 95, 99):
+        print(f"p{pct:<11}{percentile(latencies, pct) * 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+"""
+Statistics shared by the benchmarks
+"""
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Get a percentile of sorted values
+
+    Args:
+        values (list): Sorted values
+        pct (float): Percentile, 0 to 100
+
+    Returns:
+        float: Value at the percentile, 0 if there are no values
+    """
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * pct / 100))
+    return values[index]
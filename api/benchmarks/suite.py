@@ -0,0 +1,310 @@
+"""
+Reproducible benchmark suite of the generic routes, run in process
+against create_app("Testing") with a fresh SQLite database and the
+simple (or null) cache, so results only depend on the code and machine.
+
+Seeds --rows fruits and users, then drives create, read_by_id, read_all
+at several page sizes, update, and delete at --concurrency threads and
+reports throughput, p50/p95/p99 latency, and the peak memory allocated
+per request (measured in a separate sequential pass with tracemalloc).
+
+Updates and deletes are run in both write modes and labelled with it,
+"orm" loads and flushes the item (SINGLE_STATEMENT_WRITES=false, the
+default) and "single" writes it in one statement. Every other scenario
+runs with the app's configured SINGLE_STATEMENT_WRITES.
+
+    python -m benchmarks.suite [--rows 2000] [--requests 500]
+        [--concurrency 8] [--cache simple] [--output results.json]
+        [--compare baseline.json]
+
+Save the results of one commit with --output and pass them to
+--compare on another to see the relative change of every measurement.
+"""
+
+import os
+import json
+import time
+import random
+import argparse
+import platform
+import tempfile
+import threading
+import tracemalloc
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.stats import percentile
+
+# Compared measurements, True if higher is better
+measurements = {"rps": True, "p50_ms": False, "p95_ms": False,
+                "p99_ms": False, "alloc_kib": False}
+# SINGLE_STATEMENT_WRITES of the labelled update and delete runs
+write_modes = {"orm": False, "single": True}
+write_methods = ("put", "delete")
+
+
+def configure(cache_type: str) -> str:
+    """
+    Point the app at a fresh SQLite database and the given cache. Must
+    run before the app is imported since config is read from the
+    environment at import.
+
+    Args:
+        cache_type (str): "simple" or "null"
+
+    Returns:
+        str: Path of the database file
+    """
+    db_path = os.path.join(tempfile.mkdtemp(prefix="api-bench-"), "bench.db")
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+    os.environ["CACHE_TYPE"] = cache_type
+    os.environ.setdefault("BCRYPT_LOG_ROUNDS", "4")
+    return db_path
+
+
+def seed(app: object, rows: int):
+    """
+    Insert rows into fruits and users
+
+    Args:
+        app (Flask): App to seed
+        rows (int): Rows per model
+    """
+    client = app.test_client()
+    hashed = app.config["BULK_MAX_HASHED_ITEMS"]
+    for model, batch, item in (
+            ("fruits", 1000, lambda i: {"name": f"Fruit {i}"}),
+            ("users", hashed, lambda i: {"email": f"user{i}@example.com",
+                                         "password": "password"})):
+        for start in range(0, rows, batch):
+            items = [item(i) for i in range(start, min(start + batch, rows))]
+            response = client.post(f"/{model}/_bulk", json=items)
+            assert response.status_code == 200, response.data
+
+
+def scenarios(rows: int, deletes: int) -> list:
+    """
+    Build the benchmarked scenarios. Each request picks its item from a
+    seeded random generator or a counter so runs are repeatable. Deletes
+    use the last seeded fruits, counting down, and updates the rest.
+
+    Args:
+        rows (int): Seeded rows per model
+        deletes (int): Fruits reserved for deletes
+
+    Returns:
+        list: [(name, method, build request(index) -> (url, json))]
+    """
+    rng = random.Random(42)
+    lock = threading.Lock()
+
+    def random_id(index):
+        with lock:
+            return rng.randint(1, rows)
+
+    def page(per_page):
+        pages = max(1, rows // per_page)
+        return lambda index: (f"/fruits?per_page={per_page}"
+                              f"&page={index % pages + 1}", None)
+
+    updates = rows - deletes
+    return [
+        ("create_fruit", "post",
+         lambda index: ("/fruits", {"name": f"Created {index}"})),
+        ("create_user", "post",
+         lambda index: ("/users", {"email": f"created{index}@example.com",
+                                   "password": "password"})),
+        ("read_fruit", "get",
+         lambda index: (f"/fruits/{random_id(index)}", None)),
+        ("read_user", "get",
+         lambda index: (f"/users/{random_id(index)}", None)),
+        ("read_all_20", "get", page(20)),
+        ("read_all_100", "get", page(100)),
+        ("read_all_500", "get", page(500)),
+        ("update_fruit", "put",
+         lambda index: (f"/fruits/{index % updates + 1}",
+                        {"name": f"Updated {index}"})),
+        ("delete_fruit", "delete",
+         lambda index: (f"/fruits/{rows - index}", None)),
+    ]
+
+
+def run(app: object, method: str, build: object, requests: int,
+        concurrency: int, offset: int=0, expected: int=None) -> dict:
+    """
+    Send requests from concurrent threads and measure them
+
+    Args:
+        app (Flask): App to benchmark
+        method (str): HTTP method
+        build (Callable): Builds (url, json) of the request at an index
+        requests (int): Number of requests
+        concurrency (int): Number of threads
+        offset (int, optional): First request index. Defaults to 0.
+        expected (int, optional): Status of successful requests.
+                                  Defaults to any status below 400.
+
+    Returns:
+        dict: Requests, errors, throughput, and latency percentiles
+    """
+    local = threading.local()
+
+    def send(index):
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = app.test_client()
+        url, body = build(index)
+        start = time.perf_counter()
+        response = getattr(client, method)(url, json=body)
+        seconds = time.perf_counter() - start
+        if expected is not None:
+            return seconds, response.status_code == expected
+        return seconds, response.status_code < 400
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, range(offset, offset + requests)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(seconds for seconds, ok in results if ok)
+    return {"requests": len(results),
+            "errors": sum(1 for _, ok in results if not ok),
+            "rps": round(len(results) / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3)}
+
+
+def allocations(app: object, method: str, build: object, requests: int,
+                offset: int) -> float:
+    """
+    Measure the average peak memory allocated per request, sequentially
+
+    Args:
+        app (Flask): App to benchmark
+        method (str): HTTP method
+        build (Callable): Builds (url, json) of the request at an index
+        requests (int): Number of requests
+        offset (int): First request index
+
+    Returns:
+        float: KiB
+    """
+    client = app.test_client()
+    peaks = []
+    for index in range(offset, offset + requests):
+        url, body = build(index)
+        tracemalloc.start()
+        getattr(client, method)(url, json=body)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return round(sum(peaks) / len(peaks) / 1024, 1) if peaks else 0.0
+
+
+def git_commit() -> str:
+    """
+    Get the commit of the working tree
+
+    Returns:
+        str: Commit hash or None outside of a git repository
+    """
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                       stderr=subprocess.DEVNULL) \
+                         .decode("utf-8").strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict, baseline: dict):
+    """
+    Print the relative change of every measurement against a baseline
+
+    Args:
+        results (dict): Results of this run
+        baseline (dict): Results of a previous run
+    """
+    print(f"\nvs {baseline['meta'].get('commit') or 'baseline'}")
+    print(f"{'scenario':<20}" + "".join(f"{name:>12}" for name in measurements))
+    for name, result in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        changes = []
+        for measurement, higher_is_better in measurements.items():
+            old, new = previous.get(measurement), result.get(measurement)
+            if not old or new is None:
+                changes.append(f"{'-':>12}")
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if higher_is_better else change < 0
+            marker = "+" if better else "-" if abs(change) >= 5 else " "
+            changes.append(f"{change:>+10.1f}%{marker}")
+        print(f"{name:<20}" + "".join(changes))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-r", "--rows", type=int, default=2000,
+                        help="Rows seeded per model (Default: 2000)")
+    parser.add_argument("-n", "--requests", type=int, default=500,
+                        help="Requests per scenario (Default: 500)")
+    parser.add_argument("-c", "--concurrency", type=int, default=8,
+                        help="Concurrent threads (Default: 8)")
+    parser.add_argument("--cache", choices=("simple", "null"),
+                        default="simple", help="Cache type (Default: simple)")
+    parser.add_argument("--alloc-requests", type=int, default=50,
+                        help="Requests per scenario measured for "
+                             "allocations (Default: 50)")
+    parser.add_argument("-o", "--output", help="Save results as JSON")
+    parser.add_argument("--compare", help="JSON results to compare against")
+    args = parser.parse_args()
+    per_mode = args.requests + args.alloc_requests
+    deletes = len(write_modes) * per_mode
+    if args.rows <= deletes:
+        parser.error(f"--rows must be more than {len(write_modes)} times "
+                     "--requests plus --alloc-requests so updates and "
+                     "deletes have rows")
+
+    configure(args.cache)
+    from app.factory import create_app
+    app = create_app("Testing")
+    seed(app, args.rows)
+    configured = app.config["SINGLE_STATEMENT_WRITES"]
+
+    results = {"meta": {"commit": git_commit(),
+                        "python": platform.python_version(),
+                        "rows": args.rows, "requests": args.requests,
+                        "concurrency": args.concurrency, "cache": args.cache,
+                        "single_statement_writes": configured,
+                        "timestamp": time.time()},
+               "scenarios": {}}
+
+    print(f"{'scenario':<20}{'rps':>10}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'KiB/req':>10}{'errors':>8}")
+    for name, method, build in scenarios(args.rows, deletes):
+        modes = write_modes if method in write_methods \
+            else {None: configured}
+        for mode_index, (mode, single) in enumerate(modes.items()):
+            app.config["SINGLE_STATEMENT_WRITES"] = single
+            offset = mode_index * per_mode
+            result = run(app, method, build, args.requests,
+                         args.concurrency, offset)
+            result["alloc_kib"] = allocations(app, method, build,
+                                              args.alloc_requests,
+                                              offset + args.requests)
+            label = f"{name}:{mode}" if mode else name
+            results["scenarios"][label] = result
+            print(f"{label:<20}{result['rps']:>10}{result['p50_ms']:>10}"
+                  f"{result['p95_ms']:>10}{result['p99_ms']:>10}"
+                  f"{result['alloc_kib']:>10}{result['errors']:>8}")
+    app.config["SINGLE_STATEMENT_WRITES"] = configured
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(results, output, indent=2)
+    if args.compare:
+        with open(args.compare) as baseline:
+            compare(results, json.load(baseline))
+
+if __name__ == "__main__":
+    main()
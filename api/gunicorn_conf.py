@@ -0,0 +1,59 @@
+"""
+Gunicorn config, settings are read from environment variables
+
+    SERVING_MODE        "sync" (default) blocks a worker process per
+                        in-flight request, "gevent" serves up to
+                        GUNICORN_WORKER_CONNECTIONS requests per worker
+                        concurrently, overlapping their DB and cache I/O
+    GUNICORN_WORKERS    Worker processes (Default: 4)
+    GUNICORN_WORKER_CONNECTIONS
+                        Concurrent requests per gevent worker
+                        (Default: 1000)
+    GUNICORN_TIMEOUT    Seconds before a silent worker is restarted
+                        (Default: 30)
+    GUNICORN_PRELOAD    "true" to load the app once in the master
+                        before forking workers (Default: false)
+    PROMETHEUS_MULTIPROC_DIR
+                        Directory the metrics of every worker are
+                        aggregated in, emptied on start
+                        (Default: /tmp/api-metrics)
+
+http://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import os
+import shutil
+
+serving_mode = os.getenv("SERVING_MODE", "sync")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+worker_class = "gevent" if serving_mode == "gevent" else "sync"
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+preload_app = os.getenv("GUNICORN_PRELOAD") == "true"
+proc_name = "api"
+loglevel = "info"
+
+# Must be set before the workers import the app and create their metrics
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/api-metrics")
+
+
+def on_starting(server):
+    """Discard the metrics of a previous run"""
+    metrics_dir = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(metrics_dir, ignore_errors=True)
+    os.makedirs(metrics_dir)
+
+
+def child_exit(server, worker):
+    """Stop aggregating the live gauges of a dead worker"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from a preloading master"""
+    if preload_app:
+        from app.utilities.database import dispose_engines
+        dispose_engines(worker.app.wsgi())
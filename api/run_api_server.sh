@@ -1,2 +1,11 @@
 #!/bin/bash
-gunicorn 'app.factory:create_app("Prod")' --bind 0.0.0.0:8000 --workers 4 --name api --log-level info
+export FLASK_APP='app.factory:create_app("Prod")'
+
+# Create the database and tables once, before starting any API container,
+# instead of on every container start:
+#   docker-compose run --rm api init-db
+if [ "$1" = "init-db" ]; then
+    exec flask init-db
+fi
+
+gunicorn "$FLASK_APP" --config gunicorn_conf.py
@@ -0,0 +1,40 @@
+"""
+Shared fixtures. Tests run against create_app("Testing") on SQLite files
+in a temporary directory, with the Redis cache backed by fakeredis.
+
+    cd api && python -m pytest tests
+"""
+
+import fakeredis
+import pytest
+import redis
+from app import config
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """
+    Factory of apps with the given config overrides
+
+    Args:
+        tmp_path (Path): Directory of the SQLite databases
+        monkeypatch (MonkeyPatch): Restores the config after the test
+
+    Returns:
+        Callable: make_app(**config) -> Flask
+    """
+    server = fakeredis.FakeServer()
+    fake = lambda *args, **kwargs: fakeredis.FakeStrictRedis(server=server)
+    monkeypatch.setattr(redis, "Redis", fake)
+    monkeypatch.setattr(redis, "StrictRedis", fake)
+
+    def make(**overrides):
+        from app.factory import create_app
+        overrides.setdefault("SQLALCHEMY_DATABASE_URI",
+                             f"sqlite:///{tmp_path / 'primary.db'}")
+        overrides.setdefault("CACHE_TYPE", "redis")
+        for key, value in overrides.items():
+            monkeypatch.setattr(config.TestingConfig, key, value,
+                                raising=False)
+        return create_app("Testing")
+    return make
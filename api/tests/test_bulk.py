@@ -0,0 +1,56 @@
+def test_bulk_update_with_only_ids(make_app):
+    client = make_app().test_client()
+    client.post("/fruits", json={"name": "Apple"})
+
+    response = client.put("/fruits/_bulk", json=[{"id": 1}, {"id": 2}])
+    assert response.status_code == 200
+    assert [r["http_code"] for r in response.get_json()["results"]] == \
+           [200, 404]
+    assert client.get("/fruits/1").get_json()["results"][0]["name"] == "Apple"
+
+
+def test_bulk_update_mixed_rows(make_app):
+    client = make_app().test_client()
+    client.post("/fruits/_bulk", json=[{"name": "Apple"}, {"name": "Pear"}])
+
+    response = client.put("/fruits/_bulk",
+                          json=[{"id": 1}, {"id": 2, "name": "Plum"}])
+    assert [r["http_code"] for r in response.get_json()["results"]] == \
+           [200, 200]
+    assert client.get("/fruits/2").get_json()["results"][0]["name"] == "Plum"
+
+
+def test_bulk_delete_rejects_non_integer_ids(make_app):
+    client = make_app().test_client()
+    client.post("/fruits", json={"name": "Apple"})
+
+    for ids in ([True], [1, "2"], [1.0]):
+        assert client.delete("/fruits/_bulk", json=ids).status_code == 400
+    assert client.get("/fruits/1").status_code == 200
+
+
+def test_bulk_delete_repeated_ids(make_app):
+    client = make_app().test_client()
+    client.post("/fruits/_bulk", json=[{"name": "Apple"}, {"name": "Pear"}])
+
+    response = client.delete("/fruits/_bulk", json=[1, 1, 2, 3])
+    body = response.get_json()
+    assert [r["http_code"] for r in body["results"]] == [200, 404, 200, 404]
+    assert body["msg"] == "Deleted 2 of 4 fruits"
+
+
+def test_bulk_password_limit(make_app):
+    client = make_app(BULK_MAX_HASHED_ITEMS=2).test_client()
+    users = [{"email": f"user{index}@example.com", "password": "password"}
+             for index in range(3)]
+
+    response = client.post("/users/_bulk", json=users)
+    assert response.status_code == 413
+    assert client.get("/users").get_json()["results"] == []
+
+    response = client.post("/users/_bulk", json=users[:2])
+    assert response.status_code == 200
+    response = client.put("/users/_bulk",
+                          json=[{"id": _id, "password": "new"}
+                                for _id in (1, 2, 3)])
+    assert response.status_code == 413
@@ -0,0 +1,82 @@
+import json
+import time
+import fakeredis
+from flask_caching.backends.rediscache import RedisCache
+from flask_caching.backends.simple import SimpleCache
+from app.utilities.cache_backends import LRUCache, TwoTierCache
+
+
+class CountingCache(SimpleCache):
+    """SimpleCache counting the reads which reach it"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    def get(self, key):
+        self.reads += 1
+        return super().get(key)
+
+
+def eventually(check, timeout: float=2) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if check():
+            return True
+        time.sleep(0.01)
+    return check()
+
+
+def test_l1_hits_skip_l2():
+    l2 = CountingCache()
+    cache = TwoTierCache(l2, max_items=16, l1_timeout=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("a") == 1
+    assert cache.get_many("a", "b") == [1, None]
+    assert l2.reads == 2
+
+
+def test_writes_evict_l1():
+    cache = TwoTierCache(SimpleCache(), max_items=16, l1_timeout=60)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    cache.set_many({"a": 2})
+    assert cache.get("a") == 2
+    cache.delete("a")
+    assert cache.get("a") is None
+
+
+def test_lru_eviction_and_expiry(monkeypatch):
+    lru = LRUCache(max_items=2, timeout=10)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    assert lru.get("a") == 1
+    lru.set("c", 3)
+    assert lru.get("b") is None
+    assert (lru.get("a"), lru.get("c")) == (1, 3)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 11)
+    assert lru.get("a") is None
+
+
+def test_pubsub_evicts_l1_of_other_processes():
+    server = fakeredis.FakeServer()
+    first, second = (
+        TwoTierCache(RedisCache(fakeredis.FakeStrictRedis(server=server)),
+                     max_items=16, l1_timeout=60, channel="l1")
+        for _ in range(2))
+
+    # Start the subscriber of the second and wait until it listens, so
+    # its L1 can only be evicted by the invalidation messages
+    second.get("a")
+    client = first.l2._write_client
+    assert eventually(lambda: client.publish("l1", json.dumps([])) == 1)
+
+    first.set("a", 1)
+    assert second.get("a") == 1
+    first.set("a", 2)
+    assert eventually(lambda: second.get("a") == 2)
+    first.delete("a")
+    assert eventually(lambda: second.get("a") is None)
@@ -0,0 +1,65 @@
+import sqlite3
+from app.models import descriptors
+from app.utilities import caching
+
+
+def name_of(client, _id: int) -> str:
+    return client.get(f"/fruits/{_id}").get_json()["results"][0]["name"]
+
+
+def test_item_written_while_computed_is_not_cached(make_app, tmp_path,
+                                                   monkeypatch):
+    app = make_app(CACHE_DEFAULT_TIMEOUT=3600)
+    client = app.test_client()
+    client.post("/fruits", json={"name": "Apple"})
+
+    compress_all = caching.compress_all
+
+    def write_meanwhile(body: bytes) -> dict:
+        # Another request commits a write after the item was read from
+        # the database but before it is cached
+        monkeypatch.setattr(caching, "compress_all", compress_all)
+        with sqlite3.connect(tmp_path / "primary.db") as connection:
+            connection.execute("UPDATE fruits SET name = 'Pear'")
+        caching.invalidate(descriptors["fruits"], [1])
+        return compress_all(body)
+
+    monkeypatch.setattr(caching, "compress_all", write_meanwhile)
+    assert name_of(client, 1) == "Apple"
+    assert name_of(client, 1) == "Pear"
+
+
+def batch_names(client, ids: str) -> list:
+    response = client.get(f"/fruits?ids={ids}")
+    return [item["name"] for item in response.get_json()["results"]]
+
+
+def test_batch_get_keeps_item_responses_evicted(make_app, tmp_path,
+                                                monkeypatch):
+    app = make_app(CACHE_DEFAULT_TIMEOUT=3600)
+    client = app.test_client()
+    client.post("/fruits", json={"name": "Apple"})
+    assert name_of(client, 1) == "Apple"
+
+    write_batch = caching.write_batch
+
+    def write_meanwhile(descriptor, items, since):
+        with sqlite3.connect(tmp_path / "primary.db") as connection:
+            connection.execute("UPDATE fruits SET name = 'Pear'")
+        caching.invalidate(descriptor, [1])
+        write_batch(descriptor, items, since)
+
+    monkeypatch.setattr("app.controllers.generic.write_batch",
+                        write_meanwhile)
+    assert batch_names(client, "1") == ["Apple"]
+    assert name_of(client, 1) == "Pear"
+    assert batch_names(client, "1") == ["Pear"]
+
+
+def test_batch_get_is_cached_per_item(make_app):
+    client = make_app(CACHE_DEFAULT_TIMEOUT=3600).test_client()
+    client.post("/fruits/_bulk", json=[{"name": "Apple"}, {"name": "Pear"}])
+    assert batch_names(client, "2,1,3") == ["Pear", "Apple"]
+
+    client.put("/fruits/1", json={"name": "Plum"})
+    assert batch_names(client, "1,2") == ["Plum", "Pear"]
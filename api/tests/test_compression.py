@@ -0,0 +1,60 @@
+import gzip
+import brotli
+import pytest
+from app.utilities import compression
+
+
+@pytest.fixture
+def client(make_app):
+    app = make_app(CACHE_DEFAULT_TIMEOUT=3600, COMPRESS_MIN_SIZE=200,
+                   COMPRESS_ALGORITHMS="br,gzip")
+    client = app.test_client()
+    client.post("/fruits/_bulk", json=[{"name": f"Fruit {index}"}
+                                       for index in range(20)])
+    return client
+
+
+def get(client, url: str, accept: str=None):
+    headers = {"Accept-Encoding": accept} if accept else {}
+    return client.get(url, headers=headers)
+
+
+def test_negotiates_precompressed_variants(client):
+    plain = get(client, "/fruits").data
+    response = get(client, "/fruits", "gzip;q=0.5, br")
+    assert response.headers["Content-Encoding"] == "br"
+    assert brotli.decompress(response.data) == plain
+    assert "Accept-Encoding" in response.vary
+
+    response = get(client, "/fruits", "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == plain
+
+    response = get(client, "/fruits", "identity")
+    assert "Content-Encoding" not in response.headers
+    assert response.data == plain
+
+
+def test_cache_hits_are_not_recompressed(client, monkeypatch):
+    get(client, "/fruits", "gzip")
+    calls = []
+    compress = compression.compress
+    monkeypatch.setattr(compression, "compress",
+                        lambda *args: calls.append(args) or compress(*args))
+    response = get(client, "/fruits", "gzip")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert calls == []
+
+
+def test_small_bodies_are_not_compressed(client):
+    response = get(client, "/fruits/1", "gzip")
+    assert "Content-Encoding" not in response.headers
+
+
+def test_uncached_responses_are_compressed_on_the_fly(client):
+    response = client.post("/fruits/_bulk",
+                           json=[{"name": f"Other {index}"}
+                                 for index in range(20)],
+                           headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert b"Created 20 of 20" in gzip.decompress(response.data)
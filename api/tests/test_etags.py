@@ -0,0 +1,47 @@
+import pytest
+
+
+@pytest.fixture
+def client(make_app):
+    app = make_app(CACHE_DEFAULT_TIMEOUT=3600, COMPRESS_MIN_SIZE=1,
+                   COMPRESS_ALGORITHMS="gzip")
+    client = app.test_client()
+    client.post("/fruits", json={"name": "Apple"})
+    return client
+
+
+def etag_of(response) -> str:
+    return response.get_etag()[0]
+
+
+def test_matching_etag_is_not_modified(client):
+    etag = etag_of(client.get("/fruits/1"))
+    response = client.get("/fruits/1", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert etag_of(response) == etag
+
+
+def test_etag_changes_after_write(client):
+    etag = etag_of(client.get("/fruits"))
+    client.put("/fruits/1", json={"name": "Pear"})
+    response = client.get("/fruits", headers={"If-None-Match": f'"{etag}"'})
+    assert response.status_code == 200
+    assert etag_of(response) != etag
+
+
+def test_compressed_etag_has_encoding_suffix(client):
+    plain = etag_of(client.get("/fruits/1"))
+    gzip = {"Accept-Encoding": "gzip"}
+    response = client.get("/fruits/1", headers=gzip)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert etag_of(response) == f"{plain}-gzip"
+
+    response = client.get("/fruits/1",
+                          headers=dict(gzip, **{"If-None-Match":
+                                                f'"{plain}-gzip"'}))
+    assert response.status_code == 304
+    # The identity ETag doesn't match the gzip representation
+    response = client.get("/fruits/1",
+                          headers=dict(gzip, **{"If-None-Match": f'"{plain}"'}))
+    assert response.status_code == 200
@@ -0,0 +1,31 @@
+from types import SimpleNamespace
+from app.utilities.encoders import get_encoder
+from app.utilities.export import csv_chunks, ndjson_chunks
+from app.utilities.serializers import Serializer
+
+serializer = Serializer((("id", None), ("name", None)))
+rows = [SimpleNamespace(id=index, name=f"Fruit {index}")
+        for index in range(1, 4)]
+
+
+def test_ndjson_yields_first_row_at_once():
+    chunks = ndjson_chunks(iter(rows), serializer, get_encoder("stdlib"))
+    assert next(chunks) == b'{"id":1,"name":"Fruit 1"}\n'
+    assert b"".join(chunks).count(b"\n") == 2
+
+
+def test_csv_yields_header_and_first_row_at_once():
+    chunks = csv_chunks(iter(rows), serializer)
+    assert next(chunks) == b"id,name\r\n1,Fruit 1\r\n"
+    assert b"".join(chunks) == b"2,Fruit 2\r\n3,Fruit 3\r\n"
+
+
+def test_csv_without_rows_yields_header():
+    assert list(csv_chunks(iter(()), serializer)) == [b"id,name\r\n"]
+
+
+def test_export_route(make_app):
+    client = make_app().test_client()
+    client.post("/fruits/_bulk", json=[{"name": "Apple"}, {"name": "Pear"}])
+    response = client.get("/fruits/_export?format=csv&sort=id")
+    assert response.data == b"id,name\r\n1,Apple\r\n2,Pear\r\n"
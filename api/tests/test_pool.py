@@ -0,0 +1,57 @@
+import sqlite3
+import threading
+from prometheus_client import REGISTRY
+from app.utilities.pool import InstrumentedQueuePool
+
+
+def sample(name: str) -> float:
+    return REGISTRY.get_sample_value(name) or 0
+
+
+def make_pool(**kwargs) -> InstrumentedQueuePool:
+    return InstrumentedQueuePool(lambda: sqlite3.connect(":memory:"),
+                                 **kwargs)
+
+
+def test_checkouts_and_connects_are_counted():
+    pool = make_pool(pool_size=2, max_overflow=0)
+    checkouts = sample("db_pool_checkout_seconds_count")
+    connects = sample("db_pool_connects_total")
+    in_use = sample("db_pool_connections_in_use")
+
+    first, second = pool.connect(), pool.connect()
+    assert sample("db_pool_connections_in_use") == in_use + 2
+    first.close()
+    second.close()
+    pool.connect().close()
+
+    assert sample("db_pool_checkout_seconds_count") == checkouts + 3
+    assert sample("db_pool_connects_total") == connects + 2
+    assert sample("db_pool_connections_in_use") == in_use
+
+
+def test_only_checkouts_of_an_exhausted_pool_wait():
+    pool = make_pool(pool_size=1, max_overflow=0, timeout=5)
+    waits = sample("db_pool_wait_seconds_count")
+    waited = sample("db_pool_wait_seconds_sum")
+
+    held = pool.connect()
+    assert pool.exhausted()
+    assert sample("db_pool_wait_seconds_count") == waits
+
+    release = threading.Timer(0.1, held.close)
+    release.start()
+    pool.connect().close()
+    release.join()
+
+    assert sample("db_pool_wait_seconds_count") == waits + 1
+    assert sample("db_pool_wait_seconds_sum") - waited >= 0.09
+    assert not pool.exhausted()
+
+
+def test_unlimited_overflow_never_waits():
+    pool = make_pool(pool_size=1, max_overflow=-1)
+    held = [pool.connect() for _ in range(3)]
+    assert not pool.exhausted()
+    for connection in held:
+        connection.close()
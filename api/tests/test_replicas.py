@@ -0,0 +1,39 @@
+import shutil
+from app.models import descriptors
+from app.utilities.caching import generation_key, written_key
+from app.utilities.extensions.cache import cache
+from app.utilities.replicas import routed_reads
+
+
+def routed(target: str) -> float:
+    return routed_reads.labels(target=target)._value.get()
+
+
+def make_replicated_app(make_app, tmp_path):
+    """App with one replica, a copy of the freshly created primary"""
+    app = make_app(DB_REPLICA_URIS=[f"sqlite:///{tmp_path / 'replica.db'}"])
+    shutil.copy(tmp_path / "primary.db", tmp_path / "replica.db")
+    return app
+
+
+def test_reads_without_prior_write_use_replica(make_app, tmp_path):
+    app = make_replicated_app(make_app, tmp_path)
+    with app.app_context():
+        assert cache.get(generation_key(descriptors["fruits"])) is None
+        assert cache.get(written_key(descriptors["fruits"])) is None
+
+    client = app.test_client()
+    before = routed("replica_0")
+    assert client.get("/fruits/1").status_code == 404
+    assert client.get("/fruits").status_code == 200
+    assert routed("replica_0") == before + 2
+
+
+def test_reads_after_write_use_primary(make_app, tmp_path):
+    app = make_replicated_app(make_app, tmp_path)
+    app.test_client().post("/fruits", json={"name": "Apple"})
+
+    before = routed("primary")
+    response = app.test_client().get("/fruits/1")
+    assert response.status_code == 200
+    assert routed("primary") == before + 1
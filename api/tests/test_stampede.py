@@ -0,0 +1,100 @@
+import threading
+import time
+import pytest
+from flask import Response
+from app.utilities import caching
+from app.utilities.extensions.cache import cache
+
+
+class Compute(object):
+    """View standing in for a slow response, counting its calls"""
+
+    def __init__(self, body: bytes=b"fresh"):
+        self.body = body
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return Response(self.body), 200
+
+
+@pytest.fixture
+def context(make_app):
+    app = make_app(CACHE_TYPE="simple", CACHE_DEFAULT_TIMEOUT=60,
+                   CACHE_STALE_TIMEOUT=60, CACHE_LOCK_WAIT=0.2)
+    with app.test_request_context("/fruits/1"):
+        yield app
+
+
+def serve(compute: Compute) -> bytes:
+    response, _ = caching.serve("key", None, "test", compute)
+    return response.get_data()
+
+
+def expire(key: str="key"):
+    record = cache.get(key)
+    record["expires"] = time.time() - 1
+    cache.set(key, record)
+
+
+def test_miss_is_computed_once(context):
+    compute = Compute()
+    assert serve(compute) == b"fresh"
+    assert serve(compute) == b"fresh"
+    assert compute.calls == 1
+
+
+def test_stale_is_served_while_another_request_recomputes(context):
+    serve(Compute(b"stale"))
+    expire()
+    cache.add(caching.lock_key("key"), 1)
+
+    compute = Compute()
+    assert serve(compute) == b"stale"
+    assert compute.calls == 0
+
+
+def test_stale_is_recomputed_by_the_lock_holder(context):
+    serve(Compute(b"stale"))
+    expire()
+
+    compute = Compute()
+    assert serve(compute) == b"fresh"
+    assert compute.calls == 1
+    assert cache.get(caching.lock_key("key")) is None
+
+
+def test_miss_waits_for_the_lock_holder(context):
+    cache.add(caching.lock_key("key"), 1)
+
+    def lock_holder():
+        time.sleep(0.05)
+        with context.test_request_context("/fruits/1"):
+            caching.compute_record("key", None, Compute(b"other"))
+
+    thread = threading.Thread(target=lock_holder)
+    thread.start()
+    compute = Compute()
+    assert serve(compute) == b"other"
+    thread.join()
+    assert compute.calls == 0
+
+
+def test_miss_is_computed_when_the_wait_times_out(context):
+    cache.add(caching.lock_key("key"), 1)
+    compute = Compute()
+    started = time.time()
+    assert serve(compute) == b"fresh"
+    assert compute.calls == 1
+    assert time.time() - started >= 0.2
+
+
+def test_early_refresh(context, monkeypatch):
+    now = time.time()
+    record = {"expires": now + 10, "delta": 1}
+    # -log(1 - r) grows without bound as r approaches 1
+    monkeypatch.setattr(caching.random, "random", lambda: 1 - 1e-9)
+    assert caching.should_refresh(record, now)
+    monkeypatch.setattr(caching.random, "random", lambda: 0.0)
+    assert not caching.should_refresh(record, now)
+    assert caching.should_refresh(record, now + 10)
@@ -0,0 +1,57 @@
+import pytest
+from app.models.users import Users
+from app.utilities.extensions.db import db
+
+empty_password = [{"field": "password", "error": "may not be empty"}]
+
+
+@pytest.fixture(params=[False, True], ids=["orm", "single_statement"])
+def app(request, make_app):
+    app = make_app(SINGLE_STATEMENT_WRITES=request.param)
+    app.test_client().post("/users", json={"email": "user@example.com",
+                                           "password": "password"})
+    return app
+
+
+def password_of(app, _id: int) -> bytes:
+    with app.app_context():
+        return db.session.query(Users.password).filter_by(id=_id).scalar()
+
+
+def test_create_empty_password(app):
+    response = app.test_client().post(
+        "/users", json={"email": "a@example.com", "password": ""})
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == empty_password
+
+
+def test_update_empty_password(app):
+    response = app.test_client().put("/users/1", json={"password": ""})
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == empty_password
+    assert password_of(app, 1) is not None
+
+
+def test_update_null_password(app):
+    client = app.test_client()
+    assert client.put("/users/1", json={"password": None}).status_code == 200
+    assert password_of(app, 1) is None
+
+
+def test_bulk_create_empty_password(app):
+    response = app.test_client().post(
+        "/users/_bulk", json=[{"email": "a@example.com", "password": "x"},
+                              {"email": "b@example.com", "password": ""}])
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [dict(index=1, **error)
+                                             for error in empty_password]
+    assert password_of(app, 2) is None
+
+
+def test_bulk_update_empty_password(app):
+    response = app.test_client().put("/users/_bulk",
+                                     json=[{"id": 1, "password": ""}])
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [dict(index=0, **error)
+                                             for error in empty_password]
+    assert password_of(app, 1) is not None
@@ -0,0 +1,80 @@
+import pytest
+from app.models import descriptors
+from app.utilities.validation import ValidationError
+
+
+def errors_of(model: str, data: object, partial: bool=False) -> list:
+    with pytest.raises(ValidationError) as raised:
+        descriptors[model].validator(data, partial=partial)
+    return raised.value.errors
+
+
+def test_valid_body_is_converted():
+    values = descriptors["users"].validator(
+        {"email": "a@example.com", "password": "x", "admin": True,
+         "created_at": "2019-07-01T12:30:00"})
+    assert values["created_at"].isoformat() == "2019-07-01T12:30:00"
+    assert values["admin"] is True
+
+
+def test_type_errors():
+    assert errors_of("users", {"email": 1, "admin": "yes",
+                               "created_at": "noon"}) == [
+        {"field": "email", "error": "must be a string"},
+        {"field": "admin", "error": "must be a boolean"},
+        {"field": "created_at", "error": "must be an ISO 8601 datetime"},
+    ]
+    assert errors_of("fruits", {"name": "x", "id": True}) == [
+        {"field": "id", "error": "must be an integer"}]
+
+
+def test_length_and_null():
+    assert errors_of("fruits", {"name": "x" * 40}) == [
+        {"field": "name", "error": "must be at most 33 characters"}]
+    assert errors_of("users", {"email": None}, partial=True) == [
+        {"field": "email", "error": "may not be null"}]
+
+
+def test_unknown_fields_and_non_objects():
+    assert errors_of("fruits", {"name": "x", "color": "red"}) == [
+        {"field": "color", "error": "unknown field"}]
+    assert errors_of("fruits", ["name"]) == [
+        {"field": None, "error": "must be a JSON object"}]
+
+
+def test_required_fields_only_on_create():
+    assert errors_of("users", {"admin": True}) == [
+        {"field": "email", "error": "is required"}]
+    assert descriptors["users"].validator({"admin": True}, partial=True) == \
+           {"admin": True}
+
+
+def test_routes_report_errors(make_app):
+    client = make_app().test_client()
+    response = client.post("/fruits", json={"name": 1})
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"field": "name", "error": "must be a string"}]
+
+    client.post("/fruits", json={"name": "Apple"})
+    response = client.put("/fruits/1", json={"color": "red"})
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"field": "color", "error": "unknown field"}]
+
+
+def test_bulk_errors_by_index(make_app):
+    client = make_app().test_client()
+    response = client.post("/fruits/_bulk",
+                           json=[{"name": "Apple"}, {"name": 1}, "Pear", {}])
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"index": 1, "field": "name", "error": "must be a string"},
+        {"index": 2, "field": None, "error": "must be a JSON object"},
+        {"index": 3, "field": "name", "error": "is required"},
+    ]
+    assert client.get("/fruits").get_json()["results"] == []
+
+    response = client.put("/fruits/_bulk", json=[{"name": "Pear"}])
+    assert response.get_json()["errors"] == [
+        {"index": 0, "field": "id", "error": "is required"}]
@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.fixture(params=[False, True], ids=["orm", "single_statement"])
+def client(request, make_app):
+    app = make_app(SINGLE_STATEMENT_WRITES=request.param)
+    client = app.test_client()
+    client.post("/fruits", json={"name": "Apple"})
+    client.post("/users", json={"email": "user@example.com",
+                                "password": "password"})
+    return client
+
+
+def test_update(client):
+    assert client.put("/fruits/1", json={"name": "Pear"}).status_code == 200
+    assert client.get("/fruits/1").get_json()["results"][0]["name"] == "Pear"
+
+
+def test_update_missing(client):
+    assert client.put("/fruits/2", json={"name": "Pear"}).status_code == 404
+    assert client.put("/users/2", json={"password": "x"}).status_code == 404
+
+
+def test_update_invalid(client):
+    assert client.put("/fruits/1", json={"name": 1}).status_code == 400
+    assert client.put("/fruits/1", json={"id": 2}).status_code == 400
+
+
+def test_update_password(client):
+    assert client.put("/users/1", json={"password": "new"}).status_code == 200
+
+
+def test_delete(client):
+    assert client.delete("/fruits/1").status_code == 200
+    assert client.delete("/fruits/1").status_code == 404
+    assert client.get("/fruits/1").status_code == 404